@@ -0,0 +1,226 @@
+#!/usr/bin/env python3
+"""
+Microbenchmarks of the per-request CPU cost of DialClient
+
+Covers model parameter resolution, request building and serialization, header construction,
+response parsing (small, huge and chunked bodies) and request logging, using fixed fixtures and
+no network. Results are compared against a stored baseline; the run fails (exit code 1) when a
+benchmark is slower than the baseline by more than the threshold.
+
+Timings are scaled by a calibration workload measured with the baseline, so a baseline recorded
+on one machine stays usable on a faster or slower one. Re-record it with --save-baseline after an
+intended change.
+"""
+
+import argparse
+import gc
+import json
+import logging
+import os
+import platform
+import sys
+import time
+from typing import Callable, Dict
+
+os.environ.setdefault('TELEGRAM_BOT_TOKEN', 'benchmark-token')
+os.environ.setdefault('DIAL_API_KEY', 'benchmark-key')
+
+import log_config
+from dial_client import DialClient
+from log_config import LazyJson, setup_logging
+from model_config import ModelConfig
+
+BASELINE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'benchmark_dial_client_baseline.json')
+# Noise on shared machines comes in bursts, so each benchmark is timed in several rounds across the suite
+ROUNDS = 5
+REPEATS = 3
+MIN_REPEAT_SECONDS = 0.05
+CHUNK_SIZE = 16 * 1024
+
+USER_ID = "123456789"
+USER_MESSAGE = "Explain the difference between processes and threads in Python. " * 4
+HISTORY = [
+    {"role": "user" if turn % 2 == 0 else "assistant", "content": f"Turn {turn}: " + "some earlier text " * 40}
+    for turn in range(20)
+]
+SMALL_RESPONSE = json.dumps({
+    "id": "chatcmpl-1",
+    "object": "chat.completion",
+    "model": "gpt-4o",
+    "choices": [{"index": 0, "finish_reason": "stop",
+                 "message": {"role": "assistant", "content": "Processes have separate memory; threads share it."}}],
+    "usage": {"prompt_tokens": 42, "completion_tokens": 12, "total_tokens": 54}
+}).encode()
+HUGE_RESPONSE = json.dumps({
+    "id": "chatcmpl-2",
+    "object": "chat.completion",
+    "model": "gpt-4o",
+    "choices": [{"index": 0, "finish_reason": "length",
+                 "message": {"role": "assistant", "content": "A long, detailed answer with ünïcödé. " * 25000}}],
+    "usage": {"prompt_tokens": 1200, "completion_tokens": 16000, "total_tokens": 17200}
+}).encode()
+HUGE_RESPONSE_CHUNKS = [HUGE_RESPONSE[i:i + CHUNK_SIZE] for i in range(0, len(HUGE_RESPONSE), CHUNK_SIZE)]
+CALIBRATION_DATA = {"items": [{"id": i, "name": f"item-{i}", "tags": ["a", "b", "c"]} for i in range(50)]}
+
+client = DialClient()
+client_logger = logging.getLogger('dial_client')
+SHORT_REQUEST = client._build_request(USER_MESSAGE, 'gpt-4o', 1000)
+HISTORY_REQUEST = client._build_request(USER_MESSAGE, 'gpt-4o', 1000, HISTORY)
+
+
+def calibrate():
+    """Fixed pure-Python workload used to normalize timings across machines"""
+    json.loads(json.dumps(CALIBRATION_DATA))
+
+
+def parse_chunked():
+    """Reassemble a body received in chunks (as aiohttp does for chunked transfer) and parse it"""
+    client._parse_response(json.loads(b"".join(HUGE_RESPONSE_CHUNKS).decode('utf-8')))
+
+
+def log_request():
+    """Per-request INFO logging of send_message"""
+    client_logger.info(f"🚀 Sending request to https://dial.example.com/openai/deployments/gpt-4o/chat/completions "
+                       f"for user {USER_ID}")
+    client_logger.info(f"📡 Received response with status 200 for user {USER_ID}")
+    client_logger.info("📊 Token usage - Prompt: 42, Completion: 12, Total: 54")
+    client_logger.info(f"✅ Successfully got response for user {USER_ID}")
+
+
+def log_request_payloads():
+    """Per-request logging with debug payload logging enabled (caller thread cost only)"""
+    log_request()
+    if client._should_log_payload():
+        client_logger.debug("📤 Request headers: %s", LazyJson(client._build_headers(client.settings)))
+        client_logger.debug("📤 Request data: %s", LazyJson(HISTORY_REQUEST))
+
+
+BENCHMARKS: Dict[str, Callable[[], None]] = {
+    "params_standard": lambda: ModelConfig.get_model_parameters('gpt-4o', 1000, 0.7),
+    "params_reasoning": lambda: ModelConfig.get_model_parameters('o3-2025-04-16', 1000, 0.7, 'high'),
+    "params_gemini": lambda: ModelConfig.get_model_parameters('gemini-2.5-pro', 1000, 0.7),
+    "headers": lambda: client._build_headers(client.settings),
+    "build_request_short": lambda: client._build_request(USER_MESSAGE, 'gpt-4o', 1000),
+    "build_request_history": lambda: client._build_request(USER_MESSAGE, 'gpt-4o', 1000, HISTORY),
+    "serialize_short": lambda: json.dumps(SHORT_REQUEST),
+    "serialize_history": lambda: json.dumps(HISTORY_REQUEST),
+    "parse_small": lambda: client._parse_response(json.loads(SMALL_RESPONSE)),
+    "parse_huge": lambda: client._parse_response(json.loads(HUGE_RESPONSE)),
+    "parse_chunked": parse_chunked,
+    "log_info": log_request,
+    "log_debug_payloads": log_request_payloads,
+}
+
+
+def calibrate_loops(function: Callable[[], None]) -> int:
+    """Find a loop count that makes one repeat take at least MIN_REPEAT_SECONDS"""
+    loops = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(loops):
+            function()
+        if time.perf_counter() - start >= MIN_REPEAT_SECONDS:
+            return loops
+        loops *= 2
+
+
+def measure(function: Callable[[], None], loops: int) -> float:
+    """Return the best time per call in microseconds over several repeats (garbage collection off, like timeit)"""
+    best = float('inf')
+    gc_was_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        for _ in range(REPEATS):
+            start = time.perf_counter()
+            for _ in range(loops):
+                function()
+            best = min(best, (time.perf_counter() - start) / loops)
+    finally:
+        if gc_was_enabled:
+            gc.enable()
+    return best * 1_000_000
+
+
+def run_benchmarks(selected) -> Dict[str, float]:
+    """
+    Run the calibration workload and the selected benchmarks, keeping the best time of each
+
+    The bot's logging pipeline writes to /dev/null meanwhile.
+    """
+    functions = {"calibration": calibrate, **{name: BENCHMARKS[name] for name in selected}}
+    results = {name: float('inf') for name in functions}
+    with open(os.devnull, 'w', encoding='utf-8') as devnull:
+        loops = {}
+        for _ in range(ROUNDS):
+            for name, function in functions.items():
+                debug = name == "log_debug_payloads"
+                client.debug_mode = debug
+                setup_logging(logging.DEBUG if debug else logging.INFO, structured=False, stream=devnull)
+                if name not in loops:
+                    loops[name] = calibrate_loops(function)
+                results[name] = min(results[name], measure(function, loops[name]))
+                log_config.stop_logging()
+    client.debug_mode = False
+    return results
+
+
+def main():
+    """Run the benchmarks and compare them against the baseline"""
+    parser = argparse.ArgumentParser(description='DialClient per-request CPU microbenchmarks')
+    parser.add_argument('--baseline', default=BASELINE_FILE, help='Baseline JSON file')
+    parser.add_argument('--save-baseline', action='store_true', help='Store the results as the new baseline')
+    parser.add_argument('--threshold', type=float, default=0.25,
+                        help='Allowed slowdown against the baseline (default: 0.25 = 25%%)')
+    parser.add_argument('-k', '--filter', default='', help='Only run benchmarks whose name contains this text')
+    args = parser.parse_args()
+
+    selected = [name for name in BENCHMARKS if args.filter in name]
+    results = run_benchmarks(selected)
+    calibration = results.pop("calibration")
+
+    if args.save_baseline:
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump({
+                "python": platform.python_version(),
+                "calibration_us": round(calibration, 3),
+                "results": {name: round(value, 3) for name, value in results.items()},
+            }, f, indent=2)
+            f.write("\n")
+        print(f"Saved baseline of {len(results)} benchmarks to {args.baseline}")
+
+    baseline, scale = {}, 1.0
+    if os.path.exists(args.baseline):
+        with open(args.baseline, encoding='utf-8') as f:
+            stored = json.load(f)
+        baseline = stored.get("results", {})
+        scale = calibration / stored["calibration_us"]
+    else:
+        print(f"No baseline at {args.baseline}; run with --save-baseline to create one")
+
+    print(f"Calibration: {calibration:.2f} µs (baseline scaled by {scale:.2f}), "
+          f"threshold: +{args.threshold:.0%}\n")
+    print(f"{'BENCHMARK':<24} {'TIME (µs)':>12} {'BASELINE (µs)':>14} {'CHANGE':>8}")
+    print("=" * 62)
+
+    regressions = []
+    for name, value in results.items():
+        if name not in baseline:
+            print(f"{name:<24} {value:>12.2f} {'-':>14} {'new':>8}")
+            continue
+        expected = baseline[name] * scale
+        change = value / expected - 1
+        regressed = change > args.threshold
+        if regressed:
+            regressions.append(name)
+        print(f"{name:<24} {value:>12.2f} {expected:>14.2f} {change:>+8.0%}{'  REGRESSION' if regressed else ''}")
+
+    if regressions:
+        print(f"\n❌ {len(regressions)} benchmark(s) slower than the baseline by more than "
+              f"{args.threshold:.0%}: {', '.join(regressions)}")
+        return 1
+    print("\n✅ No regressions")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
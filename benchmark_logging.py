@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+Benchmark per-message logging overhead on the event loop thread
+
+Compares the original synchronous logging (eager f-string and json.dumps formatting)
+against the background queue pipeline with lazy serialization, sampling and redaction.
+Only the time spent in the calling thread is measured, since that is what delays the bot.
+"""
+
+import json
+import logging
+import os
+import sys
+import time
+
+os.environ.setdefault('TELEGRAM_BOT_TOKEN', 'benchmark-token')
+os.environ.setdefault('DIAL_API_KEY', 'benchmark-key')
+
+import config
+import log_config
+from log_config import LazyJson, redact_text, setup_logging
+
+MESSAGES = 20000
+USER_ID = "123456789"
+USER_MESSAGE = "Explain the difference between processes and threads in Python. " * 8
+HEADERS = {"Content-Type": "application/json", "Api-Key": config.DIAL_API_KEY}
+REQUEST_DATA = {"messages": [{"role": "user", "content": USER_MESSAGE}], "max_tokens": 1000, "temperature": 0.7}
+RESPONSE_DATA = {
+    "choices": [{"index": 0, "message": {"role": "assistant", "content": "A detailed answer. " * 100}}],
+    "usage": {"prompt_tokens": 120, "completion_tokens": 400, "total_tokens": 520}
+}
+
+bot_logger = logging.getLogger('bot')
+client_logger = logging.getLogger('dial_client')
+
+
+def log_message_before(debug_mode: bool):
+    """Logging calls made per message before the logging pipeline"""
+    bot_logger.info(f"📨 Received message from user ({USER_ID}): {USER_MESSAGE}")
+    bot_logger.info(f"🔄 Sending message to DIAL API for user {USER_ID}")
+    client_logger.info(f"🚀 Sending request to https://dial.example.com/openai/deployments/gpt-4o/chat/completions for user {USER_ID}")
+    if debug_mode:
+        client_logger.debug(f"📤 Request headers: {json.dumps(HEADERS, indent=2)}")
+        client_logger.debug(f"📤 Request data: {json.dumps(REQUEST_DATA, indent=2)}")
+    client_logger.info(f"📡 Received response with status 200 for user {USER_ID}")
+    if debug_mode:
+        client_logger.debug(f"📥 Full response data: {json.dumps(RESPONSE_DATA, indent=2)}")
+    client_logger.info("📊 Token usage - Prompt: 120, Completion: 400, Total: 520")
+    client_logger.info(f"✅ Successfully got response for user {USER_ID}")
+    bot_logger.info(f"✅ Successfully received response for user {USER_ID}")
+
+
+def log_message_after(debug_mode: bool):
+    """Logging calls made per message with the logging pipeline"""
+    bot_logger.info(f"📨 Received message from user ({USER_ID}), {len(USER_MESSAGE)} chars")
+    if bot_logger.isEnabledFor(logging.DEBUG):
+        bot_logger.debug("📨 Message text: %s", redact_text(USER_MESSAGE))
+    bot_logger.info(f"🔄 Sending message to DIAL API for user {USER_ID}")
+    client_logger.info(f"🚀 Sending request to https://dial.example.com/openai/deployments/gpt-4o/chat/completions for user {USER_ID}")
+    log_payload = debug_mode and client_logger.isEnabledFor(logging.DEBUG) and log_config.should_log_payload()
+    if log_payload:
+        client_logger.debug("📤 Request headers: %s", LazyJson(HEADERS))
+        client_logger.debug("📤 Request data: %s", LazyJson(REQUEST_DATA))
+    client_logger.info(f"📡 Received response with status 200 for user {USER_ID}")
+    if log_payload:
+        client_logger.debug("📥 Full response data: %s", LazyJson(RESPONSE_DATA))
+    client_logger.info("📊 Token usage - Prompt: 120, Completion: 400, Total: 520")
+    client_logger.info(f"✅ Successfully got response for user {USER_ID}")
+    bot_logger.info(f"✅ Successfully received response for user {USER_ID}")
+
+
+def time_per_message(log_function, debug_mode: bool) -> float:
+    """Return the average caller-thread time per message in microseconds"""
+    start = time.perf_counter()
+    for _ in range(MESSAGES):
+        log_function(debug_mode)
+    return (time.perf_counter() - start) / MESSAGES * 1_000_000
+
+
+def run_scenario(name: str, level: int, debug_mode: bool, sample_rate: float, devnull) -> None:
+    """Measure one scenario with both pipelines"""
+    root = logging.getLogger()
+
+    log_config.stop_logging()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    handler = logging.StreamHandler(devnull)
+    handler.setFormatter(logging.Formatter(log_config.LOG_FORMAT))
+    root.addHandler(handler)
+    root.setLevel(level)
+    before = time_per_message(log_message_before, debug_mode)
+
+    config.LOG_PAYLOAD_SAMPLE_RATE = sample_rate
+    setup_logging(level, stream=devnull, queue_size=MESSAGES)  # Nothing is dropped
+    after = time_per_message(log_message_after, debug_mode)
+    log_config.stop_logging()
+
+    print(f"{name:<40} {before:>12.1f} {after:>12.1f} {before / after:>8.1f}x")
+
+
+def main():
+    """Run all scenarios"""
+    print(f"Per-message logging overhead on the calling thread ({MESSAGES} messages)\n")
+    print(f"{'SCENARIO':<40} {'BEFORE (µs)':>12} {'AFTER (µs)':>12} {'SPEEDUP':>9}")
+    print("=" * 76)
+
+    with open(os.devnull, 'w', encoding='utf-8') as devnull:
+        run_scenario("INFO level", logging.INFO, False, 1.0, devnull)
+        run_scenario("DEBUG level, all payloads", logging.DEBUG, True, 1.0, devnull)
+        run_scenario("DEBUG level, 10% payload sampling", logging.DEBUG, True, 0.1, devnull)
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,246 @@
+#!/usr/bin/env python3
+"""
+Benchmark sharded deployment throughput against fake Telegram Bot API and DIAL servers
+
+Runs the real deployments - `python bot.py` (one process) and `python bot.py --workers N` -
+against a fake Bot API (TELEGRAM_BASE_URL) that hands out a backlog of text messages through
+getUpdates, and a fake DIAL with a fixed latency. Updates are handled exactly as in production:
+concurrently (CONCURRENT_UPDATES) with the per-chat lock, scheduler, chat state, deduplication
+and logging. Throughput is counted from the sendMessage replies, which also checks that every
+chat's messages were answered in order.
+
+DIAL concurrency is raised (--dial-concurrency) so the event loop's CPU time, not the DIAL call
+limit, is the bottleneck; the single-process deployment is the baseline of the scaling column.
+Scaling beyond the number of CPU cores is not possible, and the fake servers need CPU too.
+"""
+
+import argparse
+import multiprocessing
+import os
+import queue
+import re
+import signal
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+BOT_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'bot.py')
+TOKEN = '123456:benchmark'
+MODEL = 'benchmark-model'
+FAKE_LATENCY = 0.02
+FILLER = "This is a benchmark answer from the fake DIAL server. " * 20
+QUESTION = re.compile(r"Question number (\d+) ")
+ANSWER = re.compile(r"Answer (\d+)\.")
+MAX_UPDATES_PER_POLL = 100
+LONG_POLL_SECONDS = 1.0
+
+
+def run_fake_servers(port: int, pending_updates: multiprocessing.Queue, replies: multiprocessing.Queue):
+    """Serve the fake Bot API and DIAL endpoints (several processes share the port)"""
+    import asyncio
+    from aiohttp import web
+
+    async def telegram(request: web.Request) -> web.Response:
+        method = request.match_info['method']
+        if method == 'getMe':
+            result = {"id": 1, "is_bot": True, "first_name": "Bot", "username": "benchmark_bot",
+                      "can_join_groups": True, "can_read_all_group_messages": False, "supports_inline_queries": True}
+        elif method == 'getUpdates':
+            result = await asyncio.to_thread(take_updates)
+        elif method == 'sendMessage':
+            params = await request.post()
+            chat_id = int(params['chat_id'])
+            replies.put((chat_id, params['text']))
+            result = {"message_id": 1, "date": int(time.time()), "chat": {"id": chat_id, "type": "private"},
+                      "text": params['text']}
+        else:
+            result = True
+        return web.json_response({"ok": True, "result": result})
+
+    def take_updates() -> list:
+        """Long-poll for the first update, then return everything queued (up to the Bot API limit)"""
+        try:
+            updates = [pending_updates.get(timeout=LONG_POLL_SECONDS)]
+        except queue.Empty:
+            return []
+        while len(updates) < MAX_UPDATES_PER_POLL:
+            try:
+                updates.append(pending_updates.get_nowait())
+            except queue.Empty:
+                break
+        return updates
+
+    async def chat_completions(request: web.Request) -> web.Response:
+        data = await request.json()
+        await asyncio.sleep(FAKE_LATENCY)
+        # Echo the question number so the benchmark can check the per-chat order of the replies
+        question = QUESTION.match(data['messages'][-1]['content'])
+        content = f"Answer {question.group(1)}. {FILLER}" if question else "Summary of the conversation."
+        return web.json_response({
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": content}}],
+            "usage": {"prompt_tokens": 20, "completion_tokens": 200, "total_tokens": 220}
+        })
+
+    async def models(request: web.Request) -> web.Response:
+        return web.json_response({"data": [{"id": MODEL, "pricing": {"prompt": "0.000001", "completion": "0.000002"},
+                                            "limits": {"max_prompt_tokens": 128000}}]})
+
+    async def serve():
+        app = web.Application()
+        app.router.add_post('/bot{token}/{method}', telegram)
+        app.router.add_post('/openai/deployments/{model}/chat/completions', chat_completions)
+        app.router.add_get('/openai/models', models)
+        runner = web.AppRunner(app, access_log=None)
+        await runner.setup()
+        await web.TCPSite(runner, '127.0.0.1', port, reuse_port=True).start()
+        await asyncio.Event().wait()
+
+    asyncio.run(serve())
+
+
+def make_update(update_id: int, chat_id: int) -> dict:
+    """Build a serialized private-chat text message update"""
+    user = {"id": chat_id, "is_bot": False, "first_name": "Bench"}
+    return {
+        "update_id": update_id,
+        "message": {
+            "message_id": update_id,
+            "date": int(time.time()),
+            "chat": {"id": chat_id, "type": "private"},
+            "from": user,
+            "text": f"Question number {update_id} from chat {chat_id}"
+        }
+    }
+
+
+def get_free_port() -> int:
+    """Ask the OS for an unused local port"""
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+class Deployment:
+    """One bot deployment started as a subprocess and pointed at the fake servers"""
+
+    def __init__(self, num_workers: int, port: int, dial_concurrency: int, work_dir: str):
+        self.command = [sys.executable, BOT_SCRIPT]
+        if num_workers > 1:
+            self.command += ['--workers', str(num_workers)]
+        self.env = {
+            **os.environ,
+            'TELEGRAM_BOT_TOKEN': TOKEN,
+            'TELEGRAM_BASE_URL': f'http://127.0.0.1:{port}/bot',
+            'DIAL_API_URL': f'http://127.0.0.1:{port}',
+            'DIAL_API_KEY': 'benchmark-key',
+            'DIAL_MODEL': MODEL,
+            'DIAL_SUMMARY_MODEL': MODEL,
+            'DIAL_MAX_CONCURRENCY': str(dial_concurrency),
+            'CHAT_STATE_DB': '',
+            'CONFIG_FILE': os.path.join(work_dir, 'missing.env'),
+            'CONFIG_WATCH_INTERVAL': '0',
+        }
+        self.process = None
+
+    def __enter__(self) -> 'Deployment':
+        # A session of its own, so the supervisor and its workers can be stopped together
+        self.process = subprocess.Popen(self.command, env=self.env, stdout=subprocess.DEVNULL,
+                                        stderr=subprocess.DEVNULL, start_new_session=True)
+        return self
+
+    def __exit__(self, *exc_info):
+        os.killpg(self.process.pid, signal.SIGTERM)
+        try:
+            self.process.wait(timeout=15)
+        except subprocess.TimeoutExpired:
+            os.killpg(self.process.pid, signal.SIGKILL)
+            self.process.wait()
+
+
+def collect_replies(replies: multiprocessing.Queue, count: int, timeout: float) -> dict:
+    """Wait for a number of replies and return the answered update IDs per chat, in reply order"""
+    answered = {}
+    deadline = time.monotonic() + timeout
+    for _ in range(count):
+        chat_id, text = replies.get(timeout=max(0.1, deadline - time.monotonic()))
+        answer = ANSWER.match(text)
+        if answer is None:
+            raise RuntimeError(f"Unexpected reply in chat {chat_id}: {text[:100]}")
+        answered.setdefault(chat_id, []).append(int(answer.group(1)))
+    return answered
+
+
+def run_round(num_workers: int, args, port: int, pending_updates: multiprocessing.Queue,
+              replies: multiprocessing.Queue, next_update_id: int) -> float:
+    """Start a deployment, warm it up, and return updates per second for the measured backlog"""
+    with tempfile.TemporaryDirectory() as work_dir, \
+            Deployment(num_workers, port, args.dial_concurrency, work_dir):
+        # Warm up: one message per chat, so start-up, imports and first connections are not measured
+        for chat_id in range(1, args.chats + 1):
+            pending_updates.put(make_update(next_update_id + chat_id, chat_id))
+        collect_replies(replies, args.chats, timeout=120)
+        next_update_id += args.chats + 1
+
+        updates = [make_update(next_update_id + i, i % args.chats + 1) for i in range(args.updates)]
+        start = time.perf_counter()
+        for update in updates:
+            pending_updates.put(update)
+        answered = collect_replies(replies, args.updates, timeout=300)
+        elapsed = time.perf_counter() - start
+    # A long poll of the stopped deployment may still be waiting; it must not take the next round's updates
+    time.sleep(LONG_POLL_SECONDS + 0.5)
+
+    for chat_id, update_ids in answered.items():
+        if update_ids != sorted(update_ids):
+            raise RuntimeError(f"Chat {chat_id} was answered out of order: {update_ids}")
+    return args.updates / elapsed
+
+
+def main():
+    """Run the benchmark for the single-process deployment and each worker count"""
+    parser = argparse.ArgumentParser(description='Sharded deployment throughput benchmark')
+    parser.add_argument('--updates', type=int, default=800, help='Updates per round')
+    parser.add_argument('--chats', type=int, default=64, help='Distinct chats')
+    parser.add_argument('--workers', type=int, nargs='+', default=[2, 4, 8],
+                        help='Worker counts to test besides the single-process baseline')
+    parser.add_argument('--dial-concurrency', type=int, default=64,
+                        help='DIAL_MAX_CONCURRENCY of the bot processes')
+    parser.add_argument('--server-processes', type=int, default=2, help='Processes serving the fake APIs')
+    args = parser.parse_args()
+
+    context = multiprocessing.get_context('spawn')
+    pending_updates = context.Queue()
+    replies = context.Queue()
+    port = get_free_port()
+    servers = [context.Process(target=run_fake_servers, args=(port, pending_updates, replies), daemon=True)
+               for _ in range(args.server_processes)]
+    for server in servers:
+        server.start()
+    time.sleep(1.0)
+
+    print(f"Sharded throughput: {args.updates} updates across {args.chats} chats, "
+          f"fake DIAL latency {FAKE_LATENCY * 1000:.0f} ms, DIAL concurrency {args.dial_concurrency} "
+          f"per process, {os.cpu_count()} CPUs\n")
+    print(f"{'DEPLOYMENT':<22} {'UPDATES/S':>12} {'SCALING':>9}")
+    print("=" * 45)
+
+    baseline = None
+    next_update_id = 1
+    try:
+        for num_workers in [1, *args.workers]:
+            throughput = run_round(num_workers, args, port, pending_updates, replies, next_update_id)
+            next_update_id += args.chats + args.updates + 1
+            baseline = baseline or throughput
+            name = "single process" if num_workers == 1 else f"{num_workers} workers"
+            print(f"{name:<22} {throughput:>12.1f} {throughput / baseline:>8.2f}x")
+    finally:
+        for server in servers:
+            server.terminate()
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+"""
+Benchmark time from process start to the first handled update
+
+Starts run_bot.py against a fake Telegram Bot API and a fake DIAL server with simulated network
+latency, and measures the time from spawning the process until the reply to a waiting update
+is sent. Compares the sequential start (--full-check: full catalogue download, then bot start)
+with the fast start, both cold and with a cached readiness result.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+from aiohttp import web
+
+RUN_BOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'run_bot.py')
+TOKEN = '123456:benchmark'
+CHAT = {"id": 42, "type": "private", "first_name": "User"}
+USER = {"id": 42, "is_bot": False, "first_name": "User"}
+
+
+class FakeServers:
+    """Fake Telegram Bot API and DIAL endpoints with configurable latency"""
+
+    def __init__(self, latency: float, catalogue_seconds: float, catalogue_size: int, answer_seconds: float):
+        self.latency = latency
+        self.catalogue_seconds = catalogue_seconds
+        self.answer_seconds = answer_seconds
+        self.catalogue = json.dumps({"data": [
+            {"id": f"model-{i}", "object": "model", "pricing": {"unit": "token", "prompt": "0.000001", "completion": "0.000002"},
+             "capabilities": {"chat_completion": True}, "limits": {"max_prompt_tokens": 128000},
+             "description": "A model deployment. " * 20}
+            for i in range(catalogue_size)
+        ]})
+        self.update_id = 1000
+        self.pending_update = False
+        self.replied: asyncio.Event = asyncio.Event()
+
+    def expect_update(self):
+        """Queue one text message for the next getUpdates call"""
+        self.update_id += 1
+        self.pending_update = True
+        self.replied = asyncio.Event()
+
+    async def telegram(self, request: web.Request) -> web.Response:
+        method = request.match_info['method']
+        await asyncio.sleep(self.latency)
+        if method == 'getMe':
+            result = {"id": 1, "is_bot": True, "first_name": "Bot", "username": "benchmark_bot",
+                      "can_join_groups": True, "can_read_all_group_messages": False, "supports_inline_queries": True}
+        elif method == 'getUpdates':
+            if self.pending_update:
+                self.pending_update = False
+                result = [{"update_id": self.update_id, "message": {
+                    "message_id": 1, "date": int(time.time()), "chat": CHAT, "from": USER, "text": "hi"}}]
+            else:
+                await asyncio.sleep(1)  # Long polling without updates
+                result = []
+        elif method == 'sendMessage':
+            self.replied.set()
+            result = {"message_id": 2, "date": int(time.time()), "chat": CHAT, "text": "ok"}
+        else:
+            result = True
+        return web.json_response({"ok": True, "result": result})
+
+    async def models(self, request: web.Request) -> web.Response:
+        await asyncio.sleep(self.latency + self.catalogue_seconds)
+        return web.Response(text=self.catalogue, content_type='application/json')
+
+    async def model(self, request: web.Request) -> web.Response:
+        await asyncio.sleep(self.latency)
+        return web.json_response({"id": request.match_info['model'], "object": "model"})
+
+    async def chat(self, request: web.Request) -> web.Response:
+        await asyncio.sleep(self.latency + self.answer_seconds)
+        return web.json_response({"choices": [{"message": {"role": "assistant", "content": "Hello!"}}],
+                                  "usage": {"prompt_tokens": 5, "completion_tokens": 2, "total_tokens": 7}})
+
+    async def start(self, port: int) -> web.AppRunner:
+        app = web.Application()
+        app.router.add_post('/bot{token}/{method}', self.telegram)
+        app.router.add_get('/openai/models', self.models)
+        app.router.add_get('/openai/models/{model}', self.model)
+        app.router.add_post('/openai/deployments/{model}/chat/completions', self.chat)
+        runner = web.AppRunner(app)
+        await runner.setup()
+        await web.TCPSite(runner, '127.0.0.1', port).start()
+        return runner
+
+
+async def time_first_update(servers: FakeServers, port: int, work_dir: str, full_check: bool) -> float:
+    """Start the bot and return the seconds until it replied to the waiting update"""
+    env = {
+        **os.environ,
+        'TELEGRAM_BOT_TOKEN': TOKEN,
+        'TELEGRAM_BASE_URL': f'http://127.0.0.1:{port}/bot',
+        'DIAL_API_URL': f'http://127.0.0.1:{port}',
+        'DIAL_API_KEY': 'benchmark-key',
+        'DIAL_MODEL': 'model-1',
+        'CHAT_STATE_DB': os.path.join(work_dir, f'chat_state_{servers.update_id}.db'),
+        'READINESS_CACHE_FILE': os.path.join(work_dir, 'readiness.json'),
+        'CONFIG_FILE': os.path.join(work_dir, 'missing.env'),
+        'CONFIG_WATCH_INTERVAL': '0',
+    }
+    servers.expect_update()
+    started = time.perf_counter()
+    process = await asyncio.create_subprocess_exec(
+        sys.executable, RUN_BOT, *(['--full-check'] if full_check else []),
+        env=env, stdout=asyncio.subprocess.DEVNULL, stderr=asyncio.subprocess.DEVNULL
+    )
+    try:
+        await asyncio.wait_for(servers.replied.wait(), timeout=60)
+        return time.perf_counter() - started
+    finally:
+        process.terminate()
+        try:
+            await asyncio.wait_for(process.wait(), timeout=10)
+        except asyncio.TimeoutError:
+            process.kill()
+            await process.wait()
+
+
+async def run(args) -> int:
+    servers = FakeServers(args.latency, args.catalogue_seconds, args.catalogue_size, args.answer_seconds)
+    runner = await servers.start(args.port)
+    scenarios = [
+        ("Sequential start (--full-check)", True, False),
+        ("Fast start, cold", False, False),
+        ("Fast start, cached readiness", False, True),
+    ]
+    try:
+        print(f"Time from process start to first handled update (median of {args.runs} runs; "
+              f"{args.latency * 1000:.0f} ms network latency, catalogue {args.catalogue_seconds:.1f}s, "
+              f"answer {args.answer_seconds:.1f}s)\n")
+        print(f"{'SCENARIO':<36} {'FIRST UPDATE (s)':>18}")
+        print("=" * 56)
+        results = {}
+        for name, full_check, cached in scenarios:
+            timings = []
+            for _ in range(args.runs):
+                with tempfile.TemporaryDirectory() as work_dir:
+                    if cached:
+                        # A previous start leaves the readiness cache behind
+                        await time_first_update(servers, args.port, work_dir, full_check)
+                    timings.append(await time_first_update(servers, args.port, work_dir, full_check))
+            results[name] = statistics.median(timings)
+            print(f"{name:<36} {results[name]:>18.2f}")
+
+        baseline = results[scenarios[0][0]]
+        print()
+        for name, _, _ in scenarios[1:]:
+            print(f"{name}: {results[name] / baseline:.0%} of the sequential start")
+    finally:
+        await runner.cleanup()
+    return 0
+
+
+def main():
+    """Run the benchmark"""
+    parser = argparse.ArgumentParser(description='Bot startup benchmark')
+    parser.add_argument('--runs', type=int, default=3, help='Runs per scenario')
+    parser.add_argument('--port', type=int, default=18443, help='Port of the fake servers')
+    parser.add_argument('--latency', type=float, default=0.1, help='Simulated latency per request in seconds')
+    parser.add_argument('--catalogue-seconds', type=float, default=1.5,
+                        help='Extra time the full /openai/models download takes')
+    parser.add_argument('--catalogue-size', type=int, default=300, help='Models in the fake catalogue')
+    parser.add_argument('--answer-seconds', type=float, default=0.5, help='Time DIAL takes to answer')
+    args = parser.parse_args()
+    return asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
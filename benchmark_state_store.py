@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+Benchmark warm-start time of the chat state store with a large number of stored chats
+
+Populates a SQLite database with N chats (1M by default), then measures how long a
+restarted bot needs before it can answer: opening the store and lazily loading the
+first chats. An eager load of every chat is measured for comparison.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+
+os.environ.setdefault('TELEGRAM_BOT_TOKEN', 'benchmark-token')
+os.environ.setdefault('DIAL_API_KEY', 'benchmark-key')
+
+from chat_state import SCHEMA, ChatStateStore
+
+HISTORY = json.dumps([
+    {"role": "user", "content": "What is the capital of France?"},
+    {"role": "assistant", "content": "The capital of France is Paris."}
+])
+
+
+def populate(db_path: str, num_chats: int):
+    """Write num_chats chat rows directly with SQLite"""
+    connection = sqlite3.connect(db_path)
+    connection.execute("PRAGMA journal_mode=WAL")
+    connection.execute("PRAGMA synchronous=OFF")
+    connection.execute(SCHEMA)
+    now = time.time()
+    batch_size = 50000
+    for start in range(0, num_chats, batch_size):
+        rows = [
+            (chat_id, HISTORY, '{}', '{"turns": 1}', now)
+            for chat_id in range(start, min(start + batch_size, num_chats))
+        ]
+        with connection:
+            connection.executemany("INSERT INTO chat_state VALUES (?, ?, ?, ?, ?)", rows)
+    connection.close()
+
+
+async def warm_start(db_path: str, num_chats: int, first_chats: int):
+    """Measure store open time and first-access latency after a restart"""
+    started = time.perf_counter()
+    store = ChatStateStore(db_path=db_path)
+    await store.start()
+    opened = time.perf_counter()
+
+    first_state = await store.get(random.randrange(num_chats))
+    first_access = time.perf_counter()
+    assert first_state.counters.get("turns") == 1
+
+    await asyncio.gather(*(store.get(random.randrange(num_chats)) for _ in range(first_chats)))
+    loaded = time.perf_counter()
+
+    # A write after the restart reaches disk on the next flush
+    first_state.add_turn("And of Germany?", "Berlin.")
+    await store.flush()
+    flushed = time.perf_counter()
+    await store.close()
+
+    return {
+        "open": opened - started,
+        "first_access": first_access - opened,
+        "first_chats": loaded - first_access,
+        "flush": flushed - loaded,
+    }
+
+
+def eager_load(db_path: str) -> float:
+    """Measure loading every stored chat up front, for comparison"""
+    started = time.perf_counter()
+    connection = sqlite3.connect(db_path)
+    states = {
+        chat_id: (json.loads(history), json.loads(settings), json.loads(counters))
+        for chat_id, history, settings, counters in
+        connection.execute("SELECT chat_id, history, settings, counters FROM chat_state")
+    }
+    connection.close()
+    assert states
+    return time.perf_counter() - started
+
+
+def main():
+    """Run the benchmark"""
+    parser = argparse.ArgumentParser(description='Chat state store warm-start benchmark')
+    parser.add_argument('--chats', type=int, default=1_000_000, help='Stored chats')
+    parser.add_argument('--first-chats', type=int, default=100, help='Chats accessed right after start')
+    parser.add_argument('--skip-eager', action='store_true', help='Skip the eager full-load comparison')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db_path = os.path.join(tmp_dir, 'chat_state.db')
+
+        started = time.perf_counter()
+        populate(db_path, args.chats)
+        print(f"Populated {args.chats:,} chats in {time.perf_counter() - started:.1f}s "
+              f"({os.path.getsize(db_path) / (1024 * 1024):.0f} MB)\n")
+
+        results = asyncio.run(warm_start(db_path, args.chats, args.first_chats))
+        print("Warm start (lazy loading):")
+        rows = [
+            ("Open store", results['open']),
+            ("First chat access", results['first_access']),
+            (f"Next {args.first_chats} chats", results['first_chats']),
+            ("Flush one changed chat", results['flush']),
+            ("Ready to answer after", results['open'] + results['first_access']),
+        ]
+        for label, seconds in rows:
+            print(f"  {label + ':':<28}{seconds * 1000:>10.1f} ms")
+
+        if not args.skip_eager:
+            print(f"\n  {'Eager load of all chats:':<28}{eager_load(db_path) * 1000:>10.1f} ms")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,17 +1,84 @@
 import asyncio
 import logging
 import argparse
+import io
 import sys
+import time
+import weakref
+from typing import Optional
 from telegram import Update
-from telegram.ext import Application, CommandHandler, MessageHandler, filters, ContextTypes
-from dial_client import DialClient
+from telegram.error import TelegramError
+from telegram.ext import Application, CommandHandler, InlineQueryHandler, MessageHandler, filters, ContextTypes
+from dial_client import DialClient, DialError
+from chat_state import ChatStateStore
+from compaction import ConversationCompactor
+from update_dedup import UpdateDeduplicator
+from latency_tiers import TIER_DESCRIPTIONS, TierTracker, get_tier
+from hot_reload import ConfigReloader
+from document_qa import DocumentJob, DocumentProcessor
+from scheduler import RequestScheduler, classify_request, estimate_cost
+from inline_handler import InlineQueryManager
+from runtime_monitor import RuntimeMonitor
+from log_config import redact_text, setup_logging
 import config
 
+# Telegram limits
+MAX_MESSAGE_LENGTH = 4096
+
+
+def split_message(text: str, limit: int = MAX_MESSAGE_LENGTH) -> list:
+    """Split a long answer into messages within Telegram's limit, preferring line and word breaks"""
+    parts = []
+    while len(text) > limit:
+        cut = text.rfind('\n', 0, limit + 1)
+        if cut <= 0:
+            cut = text.rfind(' ', 0, limit + 1)
+        if cut <= 0:
+            cut = limit
+        parts.append(text[:cut])
+        text = text[cut:].lstrip('\n ')
+    if text:
+        parts.append(text)
+    return parts
+
+
 class TelegramDialBot:
-    def __init__(self, debug_mode=False):
+    def __init__(self, debug_mode=False, dial_client: Optional[DialClient] = None):
         self.debug_mode = debug_mode
-        self.dial_client = DialClient(debug_mode=debug_mode)
-        self.application = Application.builder().token(config.TELEGRAM_BOT_TOKEN).build()
+        # run_bot.py passes the client of its readiness probe so the first request reuses its connection
+        self.dial_client = dial_client or DialClient(debug_mode=debug_mode)
+        self.dial_client.debug_mode = debug_mode
+        self.monitor = RuntimeMonitor()
+        self.scheduler = RequestScheduler()
+        self.monitor.register_component("Scheduler", self.scheduler.get_stats)
+        self.state_store = ChatStateStore()
+        self.monitor.register_cache("chat_state", self.state_store.get_stats)
+        self.deduplicator = UpdateDeduplicator(self.state_store)
+        self.monitor.register_component("Dedup", self.deduplicator.get_stats)
+        self.tier_tracker = TierTracker(self.dial_client)
+        self.monitor.register_component("Tiers", self.tier_tracker.get_stats)
+        # Updates run concurrently; a per-chat lock keeps each chat's messages in order
+        self.chat_locks = weakref.WeakValueDictionary()
+        self.compactor = ConversationCompactor(self.dial_client, self.scheduler)
+        self.monitor.register_component("Compaction", self.compactor.get_stats)
+        self.inline_manager = InlineQueryManager(self.dial_client, self.scheduler)
+        self.monitor.register_cache("inline_answers", self.inline_manager.cache.get_stats)
+        self.monitor.register_component("Inline", self.inline_manager.get_stats)
+        self.document_processor = DocumentProcessor(self.dial_client, self.scheduler)
+        self.monitor.register_component("Documents", self.document_processor.get_stats)
+        self.reloader = ConfigReloader(self.dial_client)
+        self.reloader.register_listener(self.on_config_reload)
+        self.monitor.register_component("Reload", self.reloader.get_stats)
+        builder = (
+            Application.builder()
+            .token(config.TELEGRAM_BOT_TOKEN)
+            .concurrent_updates(config.CONCURRENT_UPDATES)
+            .post_init(self.post_init)
+            .post_shutdown(self.post_shutdown)
+        )
+        if config.TELEGRAM_BASE_URL:
+            builder = builder.base_url(config.TELEGRAM_BASE_URL)
+        self.application = builder.build()
         self.setup_handlers()
 
         # Configure logging level based on debug mode
@@ -30,9 +97,62 @@ class TelegramDialBot:
         self.application.add_handler(CommandHandler("models", self.models_command))
         self.application.add_handler(CommandHandler("info", self.info_command))
         self.application.add_handler(CommandHandler("debug", self.debug_command))
+        self.application.add_handler(CommandHandler("reset", self.reset_command))
+        self.application.add_handler(CommandHandler("reload", self.reload_command))
+        self.application.add_handler(CommandHandler(list(config.LATENCY_TIERS), self.tier_command))
 
         # Messages
         self.application.add_handler(MessageHandler(filters.TEXT & ~filters.COMMAND, self.handle_message))
+        self.application.add_handler(MessageHandler(
+            filters.Document.TEXT | filters.Document.FileExtension("md") | filters.Document.FileExtension("log"),
+            self.handle_document
+        ))
+
+        # Inline queries (@bot question)
+        self.application.add_handler(InlineQueryHandler(self.inline_manager.handle_inline_query))
+
+    async def post_init(self, application: Application):
+        """Start background services once the event loop is running"""
+        self.monitor.start()
+        await self.state_store.start()
+        await self.deduplicator.start()
+        self.compactor.start()
+        self.inline_manager.start()
+        self.reloader.start()
+
+    async def post_shutdown(self, application: Application):
+        """Stop background services"""
+        await self.reloader.stop()
+        await self.inline_manager.stop()
+        await self.tier_tracker.stop()
+        await self.compactor.stop()
+        await self.state_store.close()
+        await self.monitor.stop()
+
+    def on_config_reload(self, changed):
+        """Point components that copied settings at startup to the reloaded configuration"""
+        if 'DIAL_INLINE_MODEL' in changed:
+            self.inline_manager.model = config.DIAL_INLINE_MODEL
+        if 'DIAL_SUMMARY_MODEL' in changed or 'DIAL_API_URL' in changed:
+            # An unset summary model is resolved again from the (possibly new) catalogue
+            self.compactor.model = config.DIAL_SUMMARY_MODEL
+
+    def get_chat_lock(self, chat_id: int) -> asyncio.Lock:
+        """Get the lock serializing message handling within a chat"""
+        lock = self.chat_locks.get(chat_id)
+        if lock is None:
+            lock = asyncio.Lock()
+            self.chat_locks[chat_id] = lock
+        return lock
+
+    async def reply_in_parts(self, update: Update, text: str):
+        """Reply with an answer, split into several messages if it exceeds Telegram's limit"""
+        for part in split_message(text):
+            await update.message.reply_text(part)
+
+    def is_admin(self, update: Update) -> bool:
+        """Check if the user sending the update is a configured admin"""
+        return update.effective_user is not None and update.effective_user.id in config.ADMIN_USER_IDS
 
     async def start_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Handle /start command"""
@@ -55,9 +175,14 @@ class TelegramDialBot:
             "/test - Test connection to AI DIAL\n"
             "/models - List available models\n"
             "/info - Show current model information\n"
-            "/debug - Toggle debug information\n\n"
+            "/reset - Start a new conversation\n"
+            "/fast, /balanced, /deep - Choose answer speed vs. depth\n"
+            "/debug - Show debug information (admins: runtime stats, /debug profile <seconds>)\n"
+            "/reload - Reload configuration without restarting (admins only)\n\n"
             "💬 How to use:\n"
-            "Simply send me any text message and I'll respond using AI DIAL API!\n\n"
+            "Simply send me any text message and I'll respond using AI DIAL API!\n"
+            "In any other chat, type @<bot username> followed by your question for an inline answer.\n"
+            "Send a text, markdown or log file with your question as the caption to ask about it.\n\n"
             f"🤖 Current Model: {config.DIAL_MODEL}"
         )
         if self.debug_mode:
@@ -74,8 +199,54 @@ class TelegramDialBot:
         else:
             await update.message.reply_text("❌ Failed to connect to AI DIAL. Please check the configuration.")
 
+    async def reset_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        """Handle /reset command"""
+        async with self.get_chat_lock(update.effective_chat.id):
+            state = await self.state_store.get(update.effective_chat.id)
+            state.reset_history()
+        await update.message.reply_text("🧹 Conversation history cleared. Let's start over!")
+
+    async def tier_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        """Handle /fast, /balanced and /deep commands"""
+        tier_name = update.message.text.split()[0].lstrip('/').split('@')[0].lower()
+        tier = get_tier(tier_name)
+
+        state = await self.state_store.get(update.effective_chat.id)
+        state.set_setting('tier', tier_name)
+
+        await update.message.reply_text(
+            f"{TIER_DESCRIPTIONS.get(tier_name, tier_name)}\n\n"
+            f"🤖 Model: {tier['model']}\n"
+            f"📏 Output budget: {tier['max_tokens']} tokens"
+            + (f"\n🧠 Reasoning effort: {tier['reasoning_effort']}"
+               if self.dial_client.get_model_info(tier['model'])['supports_reasoning_effort'] else "")
+        )
+
+    async def reload_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        """Handle /reload command (admins only)"""
+        if not self.is_admin(update):
+            await update.message.reply_text("⛔ Reloading configuration is only available to admins.")
+            return
+
+        try:
+            result = await self.reloader.reload()
+        except (OSError, ValueError) as e:
+            await update.message.reply_text(f"❌ Reload failed, current settings kept:\n{redact_text(str(e))}")
+            return
+
+        await update.message.reply_text(
+            f"🔄 Configuration reloaded\n\n"
+            f"Changed: {', '.join(result['changed']) or 'nothing'}\n"
+            f"Model: {self.dial_client.model}\n"
+            f"Connection pool: {'kept' if result['pool_kept'] else 'replaced (new host)'}"
+        )
+
     async def debug_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Handle /debug command"""
+        if context.args and context.args[0] == "profile":
+            await self.profile_command(update, context)
+            return
+
         debug_info = (
             f"🐛 **Debug Information**\n\n"
             f"**Debug Mode:** {'✅ Enabled' if self.debug_mode else '❌ Disabled'}\n"
@@ -86,13 +257,85 @@ class TelegramDialBot:
             f"**Logging Level:** {'DEBUG' if self.debug_mode else 'INFO'}\n"
         )
 
+        state = await self.state_store.get(update.effective_chat.id)
+        debug_info += (
+            f"**History:** {len(state.history)} messages, {state.counters.get('compactions', 0)} compactions, "
+            f"~{state.counters.get('compaction_tokens_saved', 0)} prompt tokens saved per turn\n\n"
+        )
+
         if self.debug_mode:
             debug_info += "🔍 Enhanced API request/response logging is active"
         else:
             debug_info += "💡 Start bot with --debug flag to enable detailed logging"
 
+        if self.is_admin(update):
+            debug_info += "\n\n" + self._format_runtime_stats(self.monitor.get_stats(self.dial_client))
+
         await update.message.reply_text(debug_info, parse_mode='Markdown')
 
+    def _format_runtime_stats(self, stats: dict) -> str:
+        """Format runtime statistics for a Markdown reply"""
+        pool = stats['connection_pool']
+        runtime_info = (
+            f"📈 **Runtime Stats**\n\n"
+            f"**Uptime:** {stats['uptime']:.0f}s\n"
+            f"**Event Loop Lag:** {stats['loop_lag_ms']:.1f} ms (max {stats['max_loop_lag_ms']:.1f} ms)\n"
+            f"**In-flight DIAL Requests:** {stats['in_flight_requests']}\n"
+            f"**Pending Tasks:** {stats['pending_tasks']}\n"
+            f"**Connection Pool:** {pool['acquired']} in use, {pool['idle']} idle, limit {pool['limit']}\n"
+            f"**Memory RSS:** {stats['memory_rss'] / (1024 * 1024):.1f} MB\n"
+        )
+
+        for name, cache in stats['caches'].items():
+            runtime_info += (
+                f"**Cache** `{name}`: {cache['hit_ratio']:.0%} hit ratio "
+                f"({cache.get('hits', 0)} hits, {cache.get('misses', 0)} misses)\n"
+            )
+
+        for name, counters in stats['components'].items():
+            values = ", ".join(
+                f"{key}={value:.2f}" if isinstance(value, float) else f"{key}={value}"
+                for key, value in counters.items()
+            )
+            runtime_info += f"**{name}:** `{values}`\n"
+
+        return runtime_info
+
+    async def profile_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        """Handle /debug profile [seconds] - sample the event loop and send collapsed stacks"""
+        logger = logging.getLogger(__name__)
+
+        if not self.is_admin(update):
+            await update.message.reply_text("⛔ Profiling is only available to admins.")
+            return
+
+        try:
+            duration = float(context.args[1]) if len(context.args) > 1 else 10.0
+        except ValueError:
+            await update.message.reply_text("Usage: /debug profile <seconds>")
+            return
+        duration = max(1.0, min(duration, config.PROFILE_MAX_SECONDS))
+
+        await update.message.reply_text(f"🔬 Profiling event loop for {duration:.0f}s...")
+        logger.info(f"🔬 Starting {duration:.0f}s profile requested by user {update.effective_user.id}")
+
+        # Run the profile in the background so other updates keep being processed while sampling
+        context.application.create_task(self._send_profile(update, duration))
+
+    async def _send_profile(self, update: Update, duration: float):
+        """Collect a profile and send it back as a document"""
+        collapsed_stacks = await self.monitor.profile(duration)
+        if not collapsed_stacks:
+            await update.message.reply_text("❌ No samples were collected.")
+            return
+
+        filename = f"profile-{time.strftime('%Y%m%d-%H%M%S')}.collapsed.txt"
+        await update.message.reply_document(
+            document=io.BytesIO(collapsed_stacks),
+            filename=filename,
+            caption="🔥 Collapsed stacks - render with flamegraph.pl or speedscope.app"
+        )
+
     async def models_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Handle /models command"""
         await update.message.reply_text("📋 Fetching available models...")
@@ -116,10 +359,15 @@ class TelegramDialBot:
 
     async def info_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Handle /info command"""
-        model_info = self.dial_client.get_model_info()
+        state = await self.state_store.get(update.effective_chat.id)
+        tier_name = state.settings.get('tier', config.DEFAULT_LATENCY_TIER)
+        tier = get_tier(tier_name)
+        model_info = self.dial_client.get_model_info(tier['model'])
 
         info_message = (
             f"🤖 **Current Model Information**\n\n"
+            f"**Latency Tier:** {tier_name} ({tier['max_tokens']} tokens"
+            f"{', ' + tier['reasoning_effort'] + ' reasoning effort' if model_info['supports_reasoning_effort'] else ''})\n"
             f"**Model:** `{model_info['model']}`\n"
             f"**Supports Temperature:** {'✅ Yes' if model_info['supports_temperature'] else '❌ No'}\n"
             f"**Token Parameter:** `{model_info['token_param']}`\n"
@@ -135,36 +383,161 @@ class TelegramDialBot:
 
     async def handle_message(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Handle incoming text messages"""
+        # Redelivered updates (e.g. after a restart) must not trigger another DIAL call
+        is_duplicate, stored_answer = await self.deduplicator.check(update.update_id)
+        if is_duplicate:
+            if stored_answer:
+                await self.reply_in_parts(update, stored_answer)
+            return
+
+        async with self.get_chat_lock(update.effective_chat.id):
+            await self._process_message(update, context)
+
+    async def _process_message(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        """Answer a text message (called with the chat lock held)"""
         user_message = update.message.text
         user_id = str(update.effective_user.id)
         username = update.effective_user.username or "Unknown"
         logger = logging.getLogger(__name__)
 
-        logger.info(f"📨 Received message from {username} ({user_id}): {user_message}")
+        logger.info(f"📨 Received message from {username} ({user_id}), {len(user_message)} chars")
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("📨 Message text: %s", redact_text(user_message))
 
         # Send typing indicator
         await context.bot.send_chat_action(chat_id=update.effective_chat.id, action="typing")
 
         try:
-            # Get response from AI DIAL
-            logger.info(f"🔄 Sending message to DIAL API for user {user_id}")
-            response = await self.dial_client.send_message(user_message, user_id)
+            state = await self.state_store.get(update.effective_chat.id)
+
+            history = list(state.history)
+            tier_name = state.settings.get('tier', config.DEFAULT_LATENCY_TIER)
+            tier = get_tier(tier_name)
+            usage = {}
+            timing = {}
+
+            async def ask_dial():
+                started = time.monotonic()
+                try:
+                    return await self.dial_client.send_message(
+                        user_message, user_id, model=tier['model'], max_tokens=tier['max_tokens'],
+                        history=history, reasoning_effort=tier['reasoning_effort'], on_usage=usage.update
+                    )
+                finally:
+                    timing['latency'] = time.monotonic() - started
+
+            # Get response from AI DIAL, queued behind higher-priority and fairer-share requests
+            priority_class = classify_request(self.is_admin(update), update.effective_chat.type != 'private',
+                                              len(user_message))
+            logger.info(f"🔄 Sending message to DIAL API for user {user_id} ({priority_class} priority, {tier_name} tier)")
+            # The history is sent with every request and is often the largest part of the prompt
+            prompt_length = len(user_message) + sum(len(message['content']) for message in history)
+            response = await self.scheduler.run(user_id, priority_class, ask_dial,
+                                                cost=estimate_cost(prompt_length))
 
             if response:
                 logger.info(f"✅ Successfully received response for user {user_id}")
-                if self.debug_mode:
-                    logger.debug(f"📤 Sending response to user {user_id}: {response[:100]}{'...' if len(response) > 100 else ''}")
-                await update.message.reply_text(response)
+                state.add_turn(user_message, response)
+                self.deduplicator.complete(update.update_id, update.effective_chat.id, response)
+                self.compactor.maybe_schedule(state)
+                self.tier_tracker.record(tier_name, tier['model'], timing['latency'], usage)
+                if self.debug_mode and logger.isEnabledFor(logging.DEBUG):
+                    logger.debug("📤 Sending response to user %s: %s", user_id, redact_text(response[:100]))
+                await self.reply_in_parts(update, response)
             else:
                 logger.warning(f"⚠️ Empty response received for user {user_id}")
+                self.deduplicator.release(update.update_id)
                 await update.message.reply_text("Sorry, I couldn't process your request right now.")
 
+        except DialError as e:
+            # Not stored as answered, so a redelivered update tries again
+            self.deduplicator.release(update.update_id)
+            logger.warning(f"⚠️ DIAL request failed for user {user_id}: {e}")
+            await update.message.reply_text(str(e))
         except Exception as e:
+            self.deduplicator.release(update.update_id)
             logger.error(f"❌ Error handling message for user {user_id}: {e}")
             if self.debug_mode:
                 logger.debug(f"🔍 Full error details: {e}", exc_info=True)
             await update.message.reply_text("An error occurred while processing your message.")
 
+    async def handle_document(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        """Handle uploaded text documents; the caption is the question about the document"""
+        is_duplicate, stored_answer = await self.deduplicator.check(update.update_id)
+        if is_duplicate:
+            if stored_answer:
+                await self.reply_in_parts(update, stored_answer)
+            return
+
+        # The chat lock is not held while the document is processed, which can take minutes
+        document = update.message.document
+        question = update.message.caption or "Summarize this document."
+        user_id = str(update.effective_user.id)
+        logger = logging.getLogger(__name__)
+        logger.info(f"📄 Received document {document.file_name} ({document.file_size or 0} bytes) from {user_id}")
+
+        if document.file_size and document.file_size > config.DOCUMENT_MAX_BYTES:
+            self.deduplicator.release(update.update_id)
+            await update.message.reply_text(
+                f"📄 Sorry, that document is too large (limit: {config.DOCUMENT_MAX_BYTES // (1024 * 1024)} MB)."
+            )
+            return
+
+        job = DocumentJob(document.file_name or "document", document.file_size)
+        status = await update.message.reply_text(f"📄 Reading {job.name}...")
+        last_progress = time.monotonic()
+
+        async def report_progress(job: DocumentJob):
+            nonlocal last_progress
+            # Telegram rate-limits message edits
+            if time.monotonic() - last_progress < config.DOCUMENT_PROGRESS_INTERVAL:
+                return
+            last_progress = time.monotonic()
+            try:
+                await status.edit_text(job.describe_progress())
+            except TelegramError as e:
+                logger.debug(f"🔍 Could not update document progress: {e}")
+
+        succeeded = False
+        try:
+            state = await self.state_store.get(update.effective_chat.id)
+            tier = get_tier(state.settings.get('tier', config.DEFAULT_LATENCY_TIER))
+            file = await context.bot.get_file(document.file_id)
+            response = await self.document_processor.answer(
+                self.document_processor.stream_file(file.file_path, job), job, question, user_id,
+                tier['model'], tier['max_tokens'], tier['reasoning_effort'], on_progress=report_progress
+            )
+            succeeded = True
+        except DialError as e:
+            logger.warning(f"⚠️ Could not analyse document for user {user_id}: {e}")
+            response = str(e)
+        except Exception as e:
+            logger.error(f"❌ Error processing document for user {user_id}: {e}")
+            if self.debug_mode:
+                logger.debug(f"🔍 Full error details: {e}", exc_info=True)
+            response = "An error occurred while processing your document."
+        finally:
+            self.document_processor.record(job, succeeded)
+
+        if succeeded:
+            async with self.get_chat_lock(update.effective_chat.id):
+                # Processing can take minutes; the state may have been reset, compacted or evicted meanwhile
+                state = await self.state_store.get(update.effective_chat.id)
+                state.add_turn(f"[Document {job.name}] {question}", response)
+            self.deduplicator.complete(update.update_id, update.effective_chat.id, response)
+            self.compactor.maybe_schedule(state)
+        else:
+            self.deduplicator.release(update.update_id)
+
+        try:
+            await status.edit_text(
+                f"✅ Analysed {job.name}: {job.chunks_read} parts, {job.tokens:,} tokens in {job.elapsed:.1f}s "
+                f"({job.tokens_per_second:,.0f} tokens/s)" if succeeded else f"❌ Could not analyse {job.name}"
+            )
+        except TelegramError as e:
+            logger.debug(f"🔍 Could not update document status: {e}")
+        await self.reply_in_parts(update, response)
+
     def run(self):
         """Start the bot (synchronous version)"""
         logger = logging.getLogger(__name__)
@@ -177,6 +550,27 @@ class TelegramDialBot:
         # Run the bot
         self.application.run_polling(allowed_updates=Update.ALL_TYPES)
 
+    async def run_worker(self, update_queue):
+        """Process serialized updates routed by the sharded supervisor until a stop sentinel arrives"""
+        logger = logging.getLogger(__name__)
+
+        await self.application.initialize()
+        await self.post_init(self.application)
+        await self.application.start()
+        try:
+            while True:
+                update_data = await asyncio.to_thread(update_queue.get)
+                if update_data is None:
+                    break
+                # The chat lock in handle_message keeps each chat's messages ordered
+                await self.application.update_queue.put(Update.de_json(update_data, self.application.bot))
+        finally:
+            logger.info("🛑 Worker draining and shutting down")
+            await self.application.stop()
+            await self.application.shutdown()
+            await self.post_shutdown(self.application)
+            await self.dial_client.close()
+
 def main():
     """Main function with command line argument parsing"""
     parser = argparse.ArgumentParser(description='Telegram DIAL Bot')
@@ -184,21 +578,24 @@ def main():
                        help='Enable debug mode with enhanced logging')
     parser.add_argument('--log-level', choices=['DEBUG', 'INFO', 'WARNING', 'ERROR'],
                        default='INFO', help='Set logging level')
+    parser.add_argument('--workers', type=int, default=1,
+                       help='Run N worker processes with updates routed by chat ID')
 
     args = parser.parse_args()
 
     # Configure logging
     log_level = getattr(logging, args.log_level.upper())
-    logging.basicConfig(
-        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-        level=log_level
-    )
+    setup_logging(log_level)
 
     logger = logging.getLogger(__name__)
 
     try:
-        bot = TelegramDialBot(debug_mode=args.debug)
-        bot.run()
+        if args.workers > 1:
+            from supervisor import ShardedSupervisor
+            ShardedSupervisor(args.workers, debug_mode=args.debug).run()
+        else:
+            bot = TelegramDialBot(debug_mode=args.debug)
+            bot.run()
     except KeyboardInterrupt:
         logger.info("🛑 Bot stopped by user")
     except Exception as e:
@@ -0,0 +1,276 @@
+"""
+Per-chat state: conversation history, settings and counters
+
+States live in an in-memory hot tier and are persisted to SQLite with periodic,
+batched write-behind on a dedicated thread, so the event loop never waits for disk.
+A chat's state is loaded lazily on first access, which keeps startup time independent
+of the number of stored chats.
+"""
+
+import asyncio
+import json
+import logging
+import sqlite3
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+import config
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS chat_state (
+    chat_id INTEGER PRIMARY KEY,
+    history TEXT NOT NULL,
+    settings TEXT NOT NULL,
+    counters TEXT NOT NULL,
+    updated_at REAL NOT NULL
+)
+"""
+
+
+class ChatState:
+    """State kept for a single chat"""
+
+    def __init__(self, chat_id: int, history: List[Dict[str, str]] = None,
+                 settings: Dict[str, Any] = None, counters: Dict[str, int] = None,
+                 on_change: Optional[Callable[['ChatState'], None]] = None):
+        self.chat_id = chat_id
+        self.history = history if history is not None else []
+        self.settings = settings if settings is not None else {}
+        self.counters = counters if counters is not None else {}
+        self.on_change = on_change
+
+    def touch(self):
+        """Record that the state changed; call after modifying attributes directly"""
+        if self.on_change is not None:
+            self.on_change(self)
+
+    def add_turn(self, user_message: str, response: str):
+        """Append a completed user/assistant exchange to the history"""
+        self.history.append({"role": "user", "content": user_message})
+        self.history.append({"role": "assistant", "content": response})
+        self.increment("turns")
+
+    def increment(self, counter: str, amount: int = 1):
+        """Increment a named counter"""
+        self.counters[counter] = self.counters.get(counter, 0) + amount
+        self.touch()
+
+    def set_setting(self, name: str, value: Any):
+        """Change a per-chat setting"""
+        self.settings[name] = value
+        self.touch()
+
+    def reset_history(self):
+        """Forget the conversation history"""
+        self.history = []
+        self.touch()
+
+    def snapshot(self) -> Tuple[int, List[Dict[str, str]], Dict[str, Any], Dict[str, int]]:
+        """Copy the state so it can be serialized off the event loop while the chat continues"""
+        return self.chat_id, list(self.history), dict(self.settings), dict(self.counters)
+
+
+class ChatStateStore:
+    """Hot in-memory tier of chat states with write-behind persistence to SQLite"""
+
+    def __init__(self, db_path: Optional[str] = None, cache_size: int = None, flush_interval: float = None):
+        self.db_path = config.CHAT_STATE_DB if db_path is None else db_path
+        self.cache_size = cache_size or config.CHAT_STATE_CACHE_SIZE
+        self.flush_interval = flush_interval or config.CHAT_STATE_FLUSH_INTERVAL
+        self.states: OrderedDict = OrderedDict()
+        self.dirty: Dict[int, ChatState] = {}
+        self.loading: Dict[int, asyncio.Future] = {}
+        self.connection: Optional[sqlite3.Connection] = None
+        # One thread owns the SQLite connection, so every statement runs on it in order
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='chat-state-db')
+        self.stats = {"hits": 0, "misses": 0, "loaded": 0, "flushes": 0, "written": 0}
+        self._open_lock = asyncio.Lock()
+        self._flush_lock = asyncio.Lock()
+        self.flushers: List[Callable[[], Awaitable[None]]] = []
+        self._task: Optional[asyncio.Task] = None
+
+    async def run_in_db_thread(self, function, *args):
+        """Run a blocking function using the connection on the database thread"""
+        return await asyncio.get_running_loop().run_in_executor(self.executor, function, *args)
+
+    async def start(self):
+        """Open the database and start the periodic flush"""
+        await self._ensure_open()
+        if self.db_path and (self._task is None or self._task.done()):
+            self._task = asyncio.get_running_loop().create_task(self._flush_periodically())
+
+    async def close(self):
+        """Stop the periodic flush, write all pending changes and close the database"""
+        if self._task and not self._task.done():
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        await self.flush()
+        if self.connection is not None:
+            await self.run_in_db_thread(self.connection.close)
+            self.connection = None
+        self.executor.shutdown(wait=True)
+
+    async def _ensure_open(self):
+        """Open the database on first use"""
+        if self.connection is not None or not self.db_path:
+            return
+        async with self._open_lock:
+            if self.connection is None:
+                started = time.perf_counter()
+                self.connection = await self.run_in_db_thread(self._open_connection)
+                logger.info(f"💾 Opened chat state database {self.db_path} "
+                            f"in {(time.perf_counter() - started) * 1000:.1f} ms")
+
+    def _open_connection(self) -> sqlite3.Connection:
+        """Open the SQLite database in WAL mode (database thread)"""
+        connection = sqlite3.connect(self.db_path, check_same_thread=False)
+        connection.execute("PRAGMA journal_mode=WAL")
+        # WAL with synchronous=NORMAL survives process crashes; only the last flush interval can be lost
+        connection.execute("PRAGMA synchronous=NORMAL")
+        connection.execute("PRAGMA busy_timeout=5000")
+        connection.execute(SCHEMA)
+        connection.commit()
+        return connection
+
+    async def get(self, chat_id: int) -> ChatState:
+        """Get the state of a chat, loading it from the database on first access"""
+        state = self.states.get(chat_id)
+        if state is not None:
+            self.states.move_to_end(chat_id)
+            self.stats["hits"] += 1
+            return state
+
+        self.stats["misses"] += 1
+        # Concurrent first accesses of the same chat share one load
+        loading = self.loading.get(chat_id)
+        if loading is not None:
+            return await asyncio.shield(loading)
+
+        loading = asyncio.get_running_loop().create_future()
+        self.loading[chat_id] = loading
+        try:
+            state = await self._load(chat_id)
+            self._remember(state)
+            loading.set_result(state)
+            return state
+        except BaseException as e:
+            if isinstance(e, asyncio.CancelledError):
+                loading.cancel()
+            else:
+                loading.set_exception(e)
+                # Mark the exception as retrieved in case nobody else was waiting
+                loading.exception()
+            raise
+        finally:
+            del self.loading[chat_id]
+
+    async def _load(self, chat_id: int) -> ChatState:
+        """Load a chat's state from the database, or create an empty one"""
+        await self._ensure_open()
+        row = None
+        if self.connection is not None:
+            row = await self.run_in_db_thread(self._select, chat_id)
+
+        if row is None:
+            return ChatState(chat_id, on_change=self._mark_dirty)
+
+        self.stats["loaded"] += 1
+        history, settings, counters = row
+        return ChatState(chat_id, json.loads(history), json.loads(settings), json.loads(counters),
+                         on_change=self._mark_dirty)
+
+    def _select(self, chat_id: int) -> Optional[Tuple[str, str, str]]:
+        """Read one chat's row (database thread)"""
+        return self.connection.execute(
+            "SELECT history, settings, counters FROM chat_state WHERE chat_id = ?", (chat_id,)
+        ).fetchone()
+
+    def _remember(self, state: ChatState):
+        """Add a state to the hot tier"""
+        self.states[state.chat_id] = state
+        self._evict(keep=state.chat_id)
+
+    def _evict(self, keep: Optional[int] = None):
+        """Drop least recently used clean states while the hot tier is over capacity"""
+        excess = len(self.states) - self.cache_size
+        if excess <= 0:
+            return
+        victims = []
+        for chat_id in self.states:
+            if len(victims) >= excess:
+                break
+            if chat_id not in self.dirty and chat_id != keep:
+                victims.append(chat_id)
+        for chat_id in victims:
+            del self.states[chat_id]
+
+    def _mark_dirty(self, state: ChatState):
+        """Queue a changed state for the next flush"""
+        self.dirty[state.chat_id] = state
+        if state.chat_id not in self.states:
+            self.states[state.chat_id] = state
+
+    async def _flush_periodically(self):
+        """Flush dirty states at a fixed interval"""
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            try:
+                await self.flush()
+            except Exception as e:
+                logger.error(f"💥 Error flushing chat state: {e}")
+
+    def register_flusher(self, flusher: Callable[[], Awaitable[None]]):
+        """Register a coroutine function that writes other pending data on every flush"""
+        self.flushers.append(flusher)
+
+    async def flush(self):
+        """Write all dirty states to the database in one transaction"""
+        if not self.db_path:
+            return
+        async with self._flush_lock:
+            await self._ensure_open()
+            if self.dirty:
+                await self._flush_states()
+            for flusher in self.flushers:
+                await flusher()
+
+    async def _flush_states(self):
+        """Write the current batch of dirty states"""
+        batch = self.dirty
+        self.dirty = {}
+        snapshots = [state.snapshot() for state in batch.values()]
+        try:
+            await self.run_in_db_thread(self._write_batch, snapshots)
+        except Exception:
+            # Keep the changes for the next attempt unless they were modified again meanwhile
+            for chat_id, state in batch.items():
+                self.dirty.setdefault(chat_id, state)
+            raise
+        self.stats["flushes"] += 1
+        self.stats["written"] += len(snapshots)
+        self._evict()
+
+    def _write_batch(self, snapshots: List[Tuple[int, List, Dict, Dict]]):
+        """Serialize and upsert a batch of states (database thread)"""
+        now = time.time()
+        rows = [
+            (chat_id, json.dumps(history, ensure_ascii=False), json.dumps(settings), json.dumps(counters), now)
+            for chat_id, history, settings, counters in snapshots
+        ]
+        with self.connection:
+            self.connection.executemany(
+                "INSERT OR REPLACE INTO chat_state (chat_id, history, settings, counters, updated_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                rows
+            )
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get hot tier hit/miss counters for the runtime monitor"""
+        return {**self.stats, "hot": len(self.states), "dirty": len(self.dirty)}
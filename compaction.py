@@ -0,0 +1,143 @@
+"""
+Background compaction of long conversation histories using a cheap summarizer model
+"""
+
+import asyncio
+import logging
+from typing import Any, Dict, List, Optional, Set
+
+from chat_state import ChatState
+from dial_client import DialClient, DialError
+from scheduler import BULK, RequestScheduler, estimate_cost
+import config
+
+logger = logging.getLogger(__name__)
+
+SUMMARY_PREFIX = "Summary of the earlier conversation: "
+
+SUMMARY_INSTRUCTIONS = (
+    "Summarize the following conversation between a user and an AI assistant. "
+    "Keep facts, decisions, names, numbers and open questions the assistant needs to continue "
+    "the conversation. Be concise and write plain prose.\n\n"
+)
+
+
+def estimate_tokens(messages: List[Dict[str, str]]) -> int:
+    """Roughly estimate prompt tokens of a message list (about 4 characters per token plus framing)"""
+    return sum(len(message.get('content', '')) // 4 + 4 for message in messages)
+
+
+class ConversationCompactor:
+    """Summarizes older turns of long chats in the background"""
+
+    def __init__(self, dial_client: DialClient, scheduler: RequestScheduler):
+        self.dial_client = dial_client
+        self.scheduler = scheduler
+        self.token_threshold = config.COMPACTION_TOKEN_THRESHOLD
+        self.keep_messages = config.COMPACTION_KEEP_MESSAGES
+        self.model: Optional[str] = config.DIAL_SUMMARY_MODEL
+        self.queue: asyncio.Queue = asyncio.Queue()
+        self.queued_chats: Set[int] = set()
+        self.tokens_saved: Dict[int, int] = {}
+        self.totals = {"compactions": 0, "failures": 0, "tokens_saved": 0}
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self):
+        """Start the compaction worker on the running loop"""
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        """Stop the compaction worker"""
+        if self._task and not self._task.done():
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+
+    def maybe_schedule(self, state: ChatState):
+        """Queue a chat for compaction if its history has grown past the token threshold"""
+        if state.chat_id in self.queued_chats or len(state.history) <= self.keep_messages:
+            return
+        if estimate_tokens(state.history) > self.token_threshold:
+            self.queued_chats.add(state.chat_id)
+            self.queue.put_nowait(state)
+
+    async def _run(self):
+        """Compact queued chats one at a time"""
+        while True:
+            state = await self.queue.get()
+            try:
+                await self.compact(state)
+            except Exception as e:
+                self.totals["failures"] += 1
+                logger.error(f"💥 Error compacting chat {state.chat_id}: {e}")
+            finally:
+                self.queued_chats.discard(state.chat_id)
+
+    async def _get_model(self) -> str:
+        """Resolve the summarizer model, picking the cheapest catalogue model when not configured"""
+        if not self.model:
+            self.model = await self.dial_client.get_cheapest_model() or self.dial_client.model
+            logger.info(f"🗜️ Using {self.model} for conversation compaction")
+        return self.model
+
+    async def compact(self, state: ChatState) -> bool:
+        """
+        Replace all but the most recent turns of a chat with a summary
+
+        The user's requests never wait for this: they send a copy of the history, and only
+        the summarized prefix is replaced, so turns added meanwhile are kept.
+
+        Returns:
+            True if the history was compacted
+        """
+        older = state.history[:-self.keep_messages]
+        if len(older) < 2:
+            return False
+
+        transcript = "\n\n".join(f"{message['role']}: {message['content']}" for message in older)
+        prompt = SUMMARY_INSTRUCTIONS + transcript
+        model = await self._get_model()
+        try:
+            summary = await self.scheduler.run(
+                f"compaction:{state.chat_id}", BULK,
+                lambda: self.dial_client.send_message(prompt, f"compaction:{state.chat_id}",
+                                                      model=model, max_tokens=config.SUMMARY_MAX_TOKENS),
+                cost=estimate_cost(len(prompt))
+            )
+        except DialError as e:
+            self.totals["failures"] += 1
+            logger.warning(f"⚠️ Could not summarize chat {state.chat_id}: {e}")
+            return False
+        if not summary:
+            self.totals["failures"] += 1
+            logger.warning(f"⚠️ Empty summary for chat {state.chat_id}")
+            return False
+
+        # The history may have been reset or compacted while the summary was generated
+        current_prefix = state.history[:len(older)]
+        if len(current_prefix) != len(older) or any(a is not b for a, b in zip(current_prefix, older)):
+            logger.info(f"🗜️ History of chat {state.chat_id} changed during compaction, discarding summary")
+            return False
+
+        summary_message = {"role": "system", "content": SUMMARY_PREFIX + summary}
+        tokens_before = estimate_tokens(older)
+        tokens_saved = max(0, tokens_before - estimate_tokens([summary_message]))
+        state.history[:len(older)] = [summary_message]
+        state.touch()
+        state.increment("compactions")
+        state.increment("compaction_tokens_saved", tokens_saved)
+
+        self.tokens_saved[state.chat_id] = self.tokens_saved.get(state.chat_id, 0) + tokens_saved
+        self.totals["compactions"] += 1
+        self.totals["tokens_saved"] += tokens_saved
+        logger.info(f"🗜️ Compacted chat {state.chat_id}: {len(older)} messages ({tokens_before} tokens) "
+                    f"into a summary, saving ~{tokens_saved} prompt tokens per turn "
+                    f"({self.tokens_saved[state.chat_id]} total for this chat)")
+        return True
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get aggregate counters for the runtime monitor"""
+        return {**self.totals, "queued": len(self.queued_chats), "model": self.model or "auto"}
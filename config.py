@@ -1,19 +1,155 @@
 import os
-from dotenv import load_dotenv
+from typing import Any, Dict, List, Mapping
+from dotenv import dotenv_values, find_dotenv, load_dotenv
+
+# The process environment as it was before the .env file was loaded; it wins over the file
+_PROCESS_ENVIRONMENT = dict(os.environ)
+
+# Resolved once, so startup, reload() and the file watcher use the same file from any working
+# directory. Without CONFIG_FILE the .env next to this module (or in a parent directory) is used.
+CONFIG_FILE = os.path.abspath(
+    os.getenv('CONFIG_FILE') or find_dotenv() or os.path.join(os.path.dirname(os.path.abspath(__file__)), '.env')
+)
+
+load_dotenv(CONFIG_FILE)
+
+
+def _read_reloadable_settings(environ: Mapping[str, str] = os.environ) -> Dict[str, Any]:
+    """Read the settings that can be changed at runtime with reload()"""
+    getenv = environ.get
+    dial_model = getenv('DIAL_MODEL', 'chatgpt-4')
+    inline_model = getenv('DIAL_INLINE_MODEL', dial_model)
+    return {
+        # AI DIAL Configuration
+        'DIAL_API_URL': getenv('DIAL_API_URL', 'https://your-dial-api-endpoint.com'),
+        'DIAL_API_KEY': getenv('DIAL_API_KEY'),
+        'DIAL_MODEL': dial_model,
+        'DIAL_INLINE_MODEL': inline_model,
+        'DIAL_SUMMARY_MODEL': getenv('DIAL_SUMMARY_MODEL'),  # Cheapest catalogue model when unset
+
+        # Latency Tier Configuration (/fast, /balanced, /deep)
+        'DEFAULT_LATENCY_TIER': getenv('DEFAULT_LATENCY_TIER', 'balanced'),
+        'LATENCY_TIERS': {
+            'fast': {
+                'model': getenv('TIER_FAST_MODEL', inline_model),
+                'reasoning_effort': getenv('TIER_FAST_REASONING_EFFORT', 'low'),
+                'max_tokens': int(getenv('TIER_FAST_MAX_TOKENS', '500')),
+            },
+            'balanced': {
+                'model': getenv('TIER_BALANCED_MODEL', dial_model),
+                'reasoning_effort': getenv('TIER_BALANCED_REASONING_EFFORT', 'medium'),
+                'max_tokens': int(getenv('TIER_BALANCED_MAX_TOKENS', '1000')),
+            },
+            'deep': {
+                'model': getenv('TIER_DEEP_MODEL', dial_model),
+                'reasoning_effort': getenv('TIER_DEEP_REASONING_EFFORT', 'high'),
+                'max_tokens': int(getenv('TIER_DEEP_MAX_TOKENS', '4000')),
+            },
+        },
+    }
+
+
+def _validate_reloadable_settings(settings: Dict[str, Any]):
+    """Raise ValueError for invalid reloadable settings"""
+    if not settings['DIAL_API_KEY']:
+        raise ValueError("DIAL_API_KEY environment variable is required")
+
+    if settings['DEFAULT_LATENCY_TIER'] not in settings['LATENCY_TIERS']:
+        raise ValueError(f"DEFAULT_LATENCY_TIER must be one of: {', '.join(settings['LATENCY_TIERS'])}")
 
-load_dotenv()
 
 # Telegram Bot Configuration
 TELEGRAM_BOT_TOKEN = os.getenv('TELEGRAM_BOT_TOKEN')
+TELEGRAM_BASE_URL = os.getenv('TELEGRAM_BASE_URL')  # e.g. a local Bot API server; the token is appended
+
+# DIAL_API_URL, DIAL_API_KEY, DIAL_MODEL, DIAL_INLINE_MODEL, DIAL_SUMMARY_MODEL,
+# DEFAULT_LATENCY_TIER and LATENCY_TIERS
+_reloadable_settings = _read_reloadable_settings()
+globals().update(_reloadable_settings)
+
+# Hot Reload Configuration (CONFIG_FILE is resolved at the top)
+MODEL_CONFIG_FILE = os.getenv('MODEL_CONFIG_FILE')  # JSON overrides of the ModelConfig tables
+CONFIG_WATCH_INTERVAL = float(os.getenv('CONFIG_WATCH_INTERVAL', '5'))  # 0 disables watching
+
+# Request Scheduler Configuration
+CONCURRENT_UPDATES = int(os.getenv('CONCURRENT_UPDATES', '64'))
+DIAL_MAX_CONCURRENCY = int(os.getenv('DIAL_MAX_CONCURRENCY', '8'))
+SCHEDULER_WEIGHTS = os.getenv('SCHEDULER_WEIGHTS', 'admin=8,short=4,interactive=2,bulk=1')
+SCHEDULER_AGING_RATE = float(os.getenv('SCHEDULER_AGING_RATE', '0.5'))
+SHORT_PROMPT_CHARS = int(os.getenv('SHORT_PROMPT_CHARS', '200'))
+
+# Chat State Persistence Configuration (empty CHAT_STATE_DB keeps state in memory only)
+CHAT_STATE_DB = os.getenv('CHAT_STATE_DB', 'chat_state.db')
+CHAT_STATE_CACHE_SIZE = int(os.getenv('CHAT_STATE_CACHE_SIZE', '100000'))
+CHAT_STATE_FLUSH_INTERVAL = float(os.getenv('CHAT_STATE_FLUSH_INTERVAL', '2'))
 
-# AI DIAL Configuration
-DIAL_API_URL = os.getenv('DIAL_API_URL', 'https://your-dial-api-endpoint.com')
-DIAL_API_KEY = os.getenv('DIAL_API_KEY')
-DIAL_MODEL = os.getenv('DIAL_MODEL', 'chatgpt-4')
+# Update Deduplication Configuration
+DEDUP_RING_SIZE = int(os.getenv('DEDUP_RING_SIZE', '10000'))
+DEDUP_ANSWER_RETENTION = float(os.getenv('DEDUP_ANSWER_RETENTION', '86400'))  # Telegram keeps updates for 24h
+
+# Conversation Compaction Configuration
+COMPACTION_TOKEN_THRESHOLD = int(os.getenv('COMPACTION_TOKEN_THRESHOLD', '4000'))
+COMPACTION_KEEP_MESSAGES = int(os.getenv('COMPACTION_KEEP_MESSAGES', '6'))
+SUMMARY_MAX_TOKENS = int(os.getenv('SUMMARY_MAX_TOKENS', '500'))
+
+# Inline Mode Configuration
+INLINE_DEBOUNCE_SECONDS = float(os.getenv('INLINE_DEBOUNCE_SECONDS', '0.8'))
+INLINE_SESSION_IDLE_SECONDS = float(os.getenv('INLINE_SESSION_IDLE_SECONDS', '15'))
+INLINE_CACHE_SIZE = int(os.getenv('INLINE_CACHE_SIZE', '512'))
+INLINE_CACHE_TTL = float(os.getenv('INLINE_CACHE_TTL', '300'))
+INLINE_MAX_TOKENS = int(os.getenv('INLINE_MAX_TOKENS', '300'))
+
+# Document Q&A Configuration
+DOCUMENT_MAX_BYTES = int(os.getenv('DOCUMENT_MAX_BYTES', str(20 * 1024 * 1024)))  # Bot API download limit
+DOCUMENT_CHUNK_TOKENS = int(os.getenv('DOCUMENT_CHUNK_TOKENS', '3000'))  # Capped by the model's prompt limit
+DOCUMENT_MAX_PARALLEL = int(os.getenv('DOCUMENT_MAX_PARALLEL', '4'))
+DOCUMENT_PART_MAX_TOKENS = int(os.getenv('DOCUMENT_PART_MAX_TOKENS', '400'))
+DOCUMENT_PROGRESS_INTERVAL = float(os.getenv('DOCUMENT_PROGRESS_INTERVAL', '3'))
+
+# Startup Configuration (run_bot.py)
+READINESS_CACHE_FILE = os.getenv('READINESS_CACHE_FILE', '.dial_readiness.json')
+READINESS_CACHE_TTL = float(os.getenv('READINESS_CACHE_TTL', '600'))  # 0 always waits for the DIAL probe
+
+# Sharded Deployment Configuration (python bot.py --workers N)
+WORKER_RESTART_BACKOFF_SECONDS = float(os.getenv('WORKER_RESTART_BACKOFF_SECONDS', '5'))
+WEBHOOK_URL = os.getenv('WEBHOOK_URL')  # Receive updates via webhook instead of polling when set
+WEBHOOK_LISTEN = os.getenv('WEBHOOK_LISTEN', '0.0.0.0')
+WEBHOOK_PORT = int(os.getenv('WEBHOOK_PORT', '8443'))
+
+# Admin Configuration (comma-separated Telegram user IDs)
+ADMIN_USER_IDS = {int(user_id) for user_id in os.getenv('ADMIN_USER_IDS', '').split(',') if user_id.strip()}
+
+# Logging Configuration
+LOG_FORMAT = os.getenv('LOG_FORMAT', 'text').lower()  # 'text' or 'json'
+LOG_PAYLOAD_SAMPLE_RATE = float(os.getenv('LOG_PAYLOAD_SAMPLE_RATE', '1.0'))
+LOG_REDACT = os.getenv('LOG_REDACT', 'true').lower() in ('1', 'true', 'yes')
+LOG_QUEUE_SIZE = int(os.getenv('LOG_QUEUE_SIZE', '10000'))  # Records waiting for the writer thread
+
+# Runtime Monitoring Configuration
+PROFILE_MAX_SECONDS = int(os.getenv('PROFILE_MAX_SECONDS', '30'))
 
 # Validate required environment variables
 if not TELEGRAM_BOT_TOKEN:
     raise ValueError("TELEGRAM_BOT_TOKEN environment variable is required")
 
-if not DIAL_API_KEY:
-    raise ValueError("DIAL_API_KEY environment variable is required")
\ No newline at end of file
+_validate_reloadable_settings(_reloadable_settings)
+
+
+def reload() -> List[str]:
+    """
+    Re-read the reloadable settings from CONFIG_FILE and the environment
+
+    New values are validated before any of them replaces the current ones. As at startup,
+    the process environment takes precedence over CONFIG_FILE; os.environ is not modified,
+    so a setting removed from the file falls back to its default.
+
+    Returns:
+        Names of the settings that changed
+    """
+    file_values = {name: value for name, value in dotenv_values(CONFIG_FILE).items() if value is not None}
+    settings = _read_reloadable_settings({**file_values, **_PROCESS_ENVIRONMENT})
+    _validate_reloadable_settings(settings)
+
+    changed = [name for name, value in settings.items() if globals()[name] != value]
+    globals().update(settings)
+    return changed
@@ -1,20 +1,92 @@
 import asyncio
 import aiohttp
 import json
-from typing import Optional, Dict, Any
+from contextlib import asynccontextmanager
+from typing import Optional, Dict, Any, Callable, List, NamedTuple, Tuple
+from urllib.parse import urlsplit
 import config
 import logging
 from model_config import ModelConfig
+from log_config import LazyJson, redact_text, should_log_payload
 
 logger = logging.getLogger(__name__)
 
+
+class DialError(Exception):
+    """A chat completion request failed; the message can be shown to the user"""
+
+
+class DialSettings(NamedTuple):
+    """Endpoint, key and default model a request is sent with"""
+    api_url: str
+    api_key: str
+    model: str
+
+    @classmethod
+    def from_config(cls) -> 'DialSettings':
+        return cls(config.DIAL_API_URL, config.DIAL_API_KEY, config.DIAL_MODEL)
+
+
 class DialClient:
     def __init__(self, debug_mode=False):
-        self.api_url = config.DIAL_API_URL
-        self.api_key = config.DIAL_API_KEY
-        self.model = config.DIAL_MODEL
+        # Replaced as a whole on reload; each request keeps the snapshot it started with
+        self.settings = DialSettings.from_config()
         self.session = None
+        self.session_users: Dict[aiohttp.ClientSession, int] = {}
         self.debug_mode = debug_mode
+        self.in_flight_requests = 0
+        self.model_pricing: Optional[Dict[str, Tuple[float, float]]] = None
+        self.model_limits: Optional[Dict[str, Dict[str, int]]] = None
+
+    @property
+    def api_url(self) -> str:
+        return self.settings.api_url
+
+    @api_url.setter
+    def api_url(self, value: str):
+        self.settings = self.settings._replace(api_url=value)
+
+    @property
+    def api_key(self) -> str:
+        return self.settings.api_key
+
+    @api_key.setter
+    def api_key(self, value: str):
+        self.settings = self.settings._replace(api_key=value)
+
+    @property
+    def model(self) -> str:
+        return self.settings.model
+
+    @model.setter
+    def model(self, value: str):
+        self.settings = self.settings._replace(model=value)
+
+    async def apply_settings(self, settings: DialSettings) -> bool:
+        """
+        Switch to new settings without interrupting requests in flight
+
+        The connection pool is kept when the host is unchanged; otherwise the old session
+        is closed once its last request finishes.
+
+        Returns:
+            True if the warm connection pool was kept
+        """
+        old_settings = self.settings
+        self.settings = settings
+
+        old_origin = urlsplit(old_settings.api_url)[:2]
+        if urlsplit(settings.api_url)[:2] == old_origin:
+            return True
+
+        # Prices and limits belong to the old endpoint's catalogue
+        self.model_pricing = None
+        self.model_limits = None
+        old_session = self.session
+        self.session = None
+        if old_session is not None and not old_session.closed and old_session not in self.session_users:
+            await old_session.close()
+        return False
 
     async def _get_session(self) -> aiohttp.ClientSession:
         """Get or create aiohttp session"""
@@ -22,34 +94,61 @@ class DialClient:
             self.session = aiohttp.ClientSession()
         return self.session
 
+    @asynccontextmanager
+    async def _use_session(self):
+        """Use the current session; a session replaced meanwhile is closed after its last request"""
+        session = await self._get_session()
+        self.session_users[session] = self.session_users.get(session, 0) + 1
+        try:
+            yield session
+        finally:
+            self.session_users[session] -= 1
+            if not self.session_users[session]:
+                del self.session_users[session]
+                if session is not self.session and not session.closed:
+                    await session.close()
+
     async def close(self):
         """Close the aiohttp session"""
         if self.session and not self.session.closed:
             await self.session.close()
 
+    def get_pool_stats(self) -> Dict[str, Any]:
+        """Get connection pool usage of the current session"""
+        if self.session is None or self.session.closed:
+            return {"limit": 0, "acquired": 0, "idle": 0}
+
+        connector = self.session.connector
+        idle_connections = getattr(connector, '_conns', {})
+        return {
+            "limit": connector.limit,
+            "acquired": len(getattr(connector, '_acquired', ())),
+            "idle": sum(len(connections) for connections in idle_connections.values())
+        }
+
     async def test_connection(self) -> bool:
         """Test the connection to DIAL API"""
-        session = await self._get_session()
+        settings = self.settings
 
         try:
-            endpoint_url = f"{self.api_url}/openai/models"
-            headers = {"Api-Key": self.api_key}
+            endpoint_url = f"{settings.api_url}/openai/models"
+            headers = {"Api-Key": settings.api_key}
 
             logger.info(f"🔍 Testing connection to {endpoint_url}")
-            if self.debug_mode:
-                logger.debug(f"📤 Test request headers: {json.dumps(headers, indent=2)}")
+            log_payload = self._should_log_payload()
+            if log_payload:
+                logger.debug("📤 Test request headers: %s", LazyJson(headers))
 
-            async with session.get(endpoint_url, headers=headers) as response:
+            async with self._use_session() as session, session.get(endpoint_url, headers=headers) as response:
                 logger.info(f"📡 Test response status: {response.status}")
 
-                if self.debug_mode:
-                    response_headers = dict(response.headers)
-                    logger.debug(f"📥 Test response headers: {json.dumps(response_headers, indent=2)}")
+                if log_payload:
+                    logger.debug("📥 Test response headers: %s", LazyJson(dict(response.headers)))
 
                 if response.status == 200:
                     response_data = await response.json()
-                    if self.debug_mode:
-                        logger.debug(f"📥 Test response data: {json.dumps(response_data, indent=2)}")
+                    if log_payload:
+                        logger.debug("📥 Test response data: %s", LazyJson(response_data))
                     logger.info("✅ Successfully connected to DIAL API")
                     return True
                 else:
@@ -64,21 +163,43 @@ class DialClient:
                 logger.debug(f"🔍 Full connection test error details: {e}", exc_info=True)
             return False
 
-    async def list_models(self) -> Optional[list]:
-        """List available models from DIAL API"""
-        session = await self._get_session()
+    async def probe(self) -> Tuple[bool, str]:
+        """
+        Check that the endpoint, key and configured model are usable with one small request
+
+        Only the model's own catalogue entry is requested instead of the whole catalogue, and
+        the connection stays in the pool for the first chat request.
+
+        Returns:
+            (ready, detail)
+        """
+        settings = self.settings
+        endpoint_url = f"{settings.api_url}/openai/models/{settings.model}"
+        try:
+            async with self._use_session() as session, \
+                    session.get(endpoint_url, headers={"Api-Key": settings.api_key}) as response:
+                await response.read()
+                if response.status == 200:
+                    return True, f"model {settings.model} available"
+                if response.status == 404:
+                    return False, f"model {settings.model} not found"
+                return False, f"status {response.status}"
+        except Exception as e:
+            return False, f"{type(e).__name__}: {e}"
+
+    async def _fetch_models_data(self) -> Optional[List[Dict[str, Any]]]:
+        """Fetch the raw model catalogue from DIAL API"""
+        settings = self.settings
 
         try:
-            endpoint_url = f"{self.api_url}/openai/models"
-            headers = {"Api-Key": self.api_key}
+            endpoint_url = f"{settings.api_url}/openai/models"
+            headers = {"Api-Key": settings.api_key}
 
-            async with session.get(endpoint_url, headers=headers) as response:
+            async with self._use_session() as session, session.get(endpoint_url, headers=headers) as response:
                 if response.status == 200:
                     response_data = await response.json()
                     if 'data' in response_data:
-                        models = [model['id'] for model in response_data['data']]
-                        logger.info(f"Found {len(models)} available models")
-                        return models
+                        return response_data['data']
                     else:
                         logger.error("No 'data' field in models response")
                         return None
@@ -90,94 +211,215 @@ class DialClient:
             logger.error(f"Error listing models: {e}")
             return None
 
-    def get_model_info(self) -> Dict[str, Any]:
-        """Get information about the current model"""
+    async def list_models(self) -> Optional[list]:
+        """List available models from DIAL API"""
+        models_data = await self._fetch_models_data()
+        if models_data is None:
+            return None
+
+        models = [model['id'] for model in models_data]
+        logger.info(f"Found {len(models)} available models")
+        return models
+
+    async def get_model_pricing(self, refresh: bool = False) -> Dict[str, Tuple[float, float]]:
+        """
+        Get per-token (prompt, completion) prices of chat models from the catalogue
+
+        Results are cached; only models with pricing that support chat completion are included.
+        """
+        if self.model_pricing is not None and not refresh:
+            return self.model_pricing
+
+        models_data = await self._fetch_models_data()
+        if models_data is None:
+            return self.model_pricing or {}
+
+        pricing = {}
+        for model in models_data:
+            model_pricing = model.get('pricing')
+            if not model_pricing or not model.get('capabilities', {}).get('chat_completion', True):
+                continue
+            try:
+                pricing[model['id']] = (float(model_pricing.get('prompt', 0)),
+                                        float(model_pricing.get('completion', 0)))
+            except (TypeError, ValueError):
+                continue
+
+        self.model_pricing = pricing
+        return pricing
+
+    async def get_model_limits(self, refresh: bool = False) -> Dict[str, Dict[str, int]]:
+        """
+        Get token limits of models from the catalogue
+
+        Results are cached; each value holds the catalogue's 'limits' entry, e.g.
+        max_prompt_tokens, max_completion_tokens and max_total_tokens.
+        """
+        if self.model_limits is not None and not refresh:
+            return self.model_limits
+
+        models_data = await self._fetch_models_data()
+        if models_data is None:
+            return self.model_limits or {}
+
+        self.model_limits = {
+            model['id']: {name: value for name, value in model['limits'].items() if isinstance(value, int)}
+            for model in models_data if isinstance(model.get('limits'), dict)
+        }
+        return self.model_limits
+
+    async def get_prompt_limit(self, model: str) -> Optional[int]:
+        """Get the maximum prompt tokens of a model, or None if the catalogue does not say"""
+        limits = (await self.get_model_limits()).get(model, {})
+        return limits.get('max_prompt_tokens') or limits.get('max_total_tokens')
+
+    async def get_cheapest_model(self) -> Optional[str]:
+        """Get the chat model with the lowest combined prompt + completion price"""
+        pricing = await self.get_model_pricing()
+        if not pricing:
+            return None
+        return min(pricing, key=lambda model: sum(pricing[model]))
+
+    def get_model_info(self, model: Optional[str] = None) -> Dict[str, Any]:
+        """Get information about the current (or the given) model"""
+        model = model or self.model
         return {
-            "model": self.model,
-            "supports_temperature": ModelConfig.supports_temperature(self.model),
-            "token_param": ModelConfig.get_token_param_name(self.model),
-            "is_reasoning_model": ModelConfig.is_reasoning_model(self.model)
+            "model": model,
+            "supports_temperature": ModelConfig.supports_temperature(model),
+            "token_param": ModelConfig.get_token_param_name(model),
+            "is_reasoning_model": ModelConfig.is_reasoning_model(model),
+            "supports_reasoning_effort": ModelConfig.supports_reasoning_effort(model),
+            "supports_system_messages": ModelConfig.supports_system_messages(model)
         }
 
-    def _get_model_parameters(self, model: str, max_tokens: int = 1000, temperature: float = 0.7) -> Dict[str, Any]:
+    def _should_log_payload(self) -> bool:
+        """Check whether verbose payload logging is enabled and sampled for this request"""
+        return self.debug_mode and logger.isEnabledFor(logging.DEBUG) and should_log_payload()
+
+    def _get_model_parameters(self, model: str, max_tokens: int = 1000, temperature: float = 0.7,
+                              reasoning_effort: Optional[str] = None) -> Dict[str, Any]:
         """Get appropriate parameters for the specific model"""
-        return ModelConfig.get_model_parameters(model, max_tokens, temperature)
+        return ModelConfig.get_model_parameters(model, max_tokens, temperature, reasoning_effort)
+
+    def estimate_cost(self, model: str, usage: Dict[str, int]) -> Optional[float]:
+        """Estimate the price of a request from its token usage and cached catalogue pricing"""
+        if not self.model_pricing or model not in self.model_pricing:
+            return None
+        prompt_price, completion_price = self.model_pricing[model]
+        return usage.get('prompt_tokens', 0) * prompt_price + usage.get('completion_tokens', 0) * completion_price
 
-    async def send_message(self, user_message: str, user_id: str) -> Optional[str]:
+    def _build_headers(self, settings: DialSettings) -> Dict[str, str]:
+        """Build the headers of a chat completion request"""
+        return {
+            "Content-Type": "application/json",
+            "Api-Key": settings.api_key
+        }
+
+    def _build_request(self, user_message: str, model: str, max_tokens: int,
+                       history: Optional[List[Dict[str, str]]] = None,
+                       reasoning_effort: Optional[str] = None) -> Dict[str, Any]:
+        """Build the body of a chat completion request with model-specific parameters"""
+        messages = [
+            *(history or []),
+            {
+                "role": "user",
+                "content": user_message
+            }
+        ]
+        if model in ModelConfig.NO_SYSTEM_MESSAGE_MODELS:
+            messages = ModelConfig.adapt_messages(model, messages)
+        return {
+            "messages": messages,
+            **self._get_model_parameters(model, max_tokens, reasoning_effort=reasoning_effort)
+        }
+
+    @staticmethod
+    def _parse_response(response_data: Dict[str, Any]) -> str:
+        """
+        Extract the answer text from a chat completion response
+
+        Raises:
+            DialError: If the response has an unexpected format
+        """
+        if 'choices' in response_data and len(response_data['choices']) > 0:
+            choice = response_data['choices'][0]
+            if 'message' in choice and 'content' in choice['message']:
+                return choice['message']['content']
+            logger.error("❌ Unexpected response format: %s", LazyJson(response_data))
+            raise DialError("Sorry, I received an unexpected response format.")
+        logger.error("❌ No choices in response: %s", LazyJson(response_data))
+        raise DialError("Sorry, I didn't receive a valid response.")
+
+    async def send_message(self, user_message: str, user_id: str, model: Optional[str] = None,
+                           max_tokens: int = 1000, history: Optional[List[Dict[str, str]]] = None,
+                           reasoning_effort: Optional[str] = None,
+                           on_usage: Optional[Callable[[Dict[str, int]], None]] = None) -> str:
         """
         Send a message to AI DIAL and get the response
+
+        Args:
+            user_message: Text to send
+            user_id: ID of the requesting user, used for logging
+            model: Deployment to use instead of the configured model
+            max_tokens: Output token budget
+            history: Earlier messages of the conversation to send before the user message
+            reasoning_effort: Reasoning effort for reasoning models that support it
+            on_usage: Called with the token usage of a successful response
+
+        Returns:
+            The model's answer
+
+        Raises:
+            DialError: If the request failed, with a message that can be shown to the user
         """
-        session = await self._get_session()
+        settings = self.settings
+        model = model or settings.model
+        self.in_flight_requests += 1
 
         try:
-            # Create chat completion request
-            messages = [
-                {
-                    "role": "user",
-                    "content": user_message
-                }
-            ]
-
-            # Get model-specific parameters
-            model_params = self._get_model_parameters(self.model)
-
-            # Prepare request data
-            request_data = {
-                "messages": messages,
-                **model_params
-            }
+            # Create chat completion request with model-specific parameters
+            request_data = self._build_request(user_message, model, max_tokens, history, reasoning_effort)
 
             # Construct the API endpoint URL
-            endpoint_url = f"{self.api_url}/openai/deployments/{self.model}/chat/completions"
-
-            # Prepare headers
-            headers = {
-                "Content-Type": "application/json",
-                "Api-Key": self.api_key
-            }
+            endpoint_url = f"{settings.api_url}/openai/deployments/{model}/chat/completions"
+            headers = self._build_headers(settings)
 
             logger.info(f"🚀 Sending request to {endpoint_url} for user {user_id}")
-            if self.debug_mode:
-                logger.debug(f"📤 Request headers: {json.dumps(headers, indent=2)}")
-                logger.debug(f"📤 Request data: {json.dumps(request_data, indent=2)}")
+            log_payload = self._should_log_payload()
+            if log_payload:
+                logger.debug("📤 Request headers: %s", LazyJson(headers))
+                logger.debug("📤 Request data: %s", LazyJson(request_data))
 
             # Make the API request
-            async with session.post(endpoint_url, json=request_data, headers=headers) as response:
+            async with self._use_session() as session, \
+                    session.post(endpoint_url, json=request_data, headers=headers) as response:
                 logger.info(f"📡 Received response with status {response.status} for user {user_id}")
 
-                if self.debug_mode:
-                    response_headers = dict(response.headers)
-                    logger.debug(f"📥 Response headers: {json.dumps(response_headers, indent=2)}")
+                if log_payload:
+                    logger.debug("📥 Response headers: %s", LazyJson(dict(response.headers)))
 
                 if response.status == 200:
                     response_data = await response.json()
 
-                    if self.debug_mode:
-                        logger.debug(f"📥 Full response data: {json.dumps(response_data, indent=2)}")
+                    if log_payload:
+                        logger.debug("📥 Full response data: %s", LazyJson(response_data))
 
                     # Extract the response text
-                    if 'choices' in response_data and len(response_data['choices']) > 0:
-                        choice = response_data['choices'][0]
-                        if 'message' in choice and 'content' in choice['message']:
-                            response_text = choice['message']['content']
-
-                            # Log usage information if available
-                            if 'usage' in response_data:
-                                usage = response_data['usage']
-                                logger.info(f"📊 Token usage - Prompt: {usage.get('prompt_tokens', 0)}, "
-                                          f"Completion: {usage.get('completion_tokens', 0)}, "
-                                          f"Total: {usage.get('total_tokens', 0)}")
-
-                            logger.info(f"✅ Successfully got response for user {user_id}")
-                            if self.debug_mode:
-                                logger.debug(f"📤 Response text (first 200 chars): {response_text[:200]}{'...' if len(response_text) > 200 else ''}")
-                            return response_text
-                        else:
-                            logger.error(f"❌ Unexpected response format: {response_data}")
-                            return "Sorry, I received an unexpected response format."
-                    else:
-                        logger.error(f"❌ No choices in response: {response_data}")
-                        return "Sorry, I didn't receive a valid response."
+                    response_text = self._parse_response(response_data)
+
+                    # Log usage information if available
+                    if 'usage' in response_data:
+                        usage = response_data['usage']
+                        logger.info(f"📊 Token usage - Prompt: {usage.get('prompt_tokens', 0)}, "
+                                  f"Completion: {usage.get('completion_tokens', 0)}, "
+                                  f"Total: {usage.get('total_tokens', 0)}")
+                        if on_usage is not None:
+                            on_usage(usage)
+
+                    logger.info(f"✅ Successfully got response for user {user_id}")
+                    if log_payload:
+                        logger.debug("📤 Response text: %s", redact_text(response_text[:200]))
+                    return response_text
                 else:
                     error_text = await response.text()
                     logger.error(f"❌ API request failed with status {response.status}: {error_text}")
@@ -191,19 +433,23 @@ class DialClient:
                         if 'error' in error_data and 'message' in error_data['error']:
                             error_msg = error_data['error']['message']
                             logger.error(f"🔍 Parsed error message: {error_msg}")
-                            return f"API Error: {error_msg}"
+                            raise DialError(f"API Error: {error_msg}")
                     except json.JSONDecodeError:
                         logger.debug("🔍 Could not parse error response as JSON")
 
-                    return f"Sorry, the AI service returned an error (status {response.status})."
+                    raise DialError(f"Sorry, the AI service returned an error (status {response.status}).")
 
+        except DialError:
+            raise
         except aiohttp.ClientError as e:
             logger.error(f"🌐 Network error sending message to DIAL: {e}")
             if self.debug_mode:
                 logger.debug(f"🔍 Full network error details: {e}", exc_info=True)
-            return "Sorry, I encountered a network error while processing your request."
+            raise DialError("Sorry, I encountered a network error while processing your request.") from e
         except Exception as e:
             logger.error(f"💥 Unexpected error sending message to DIAL: {e}")
             if self.debug_mode:
                 logger.debug(f"🔍 Full unexpected error details: {e}", exc_info=True)
-            return "Sorry, I encountered an unexpected error while processing your request."
\ No newline at end of file
+            raise DialError("Sorry, I encountered an unexpected error while processing your request.") from e
+        finally:
+            self.in_flight_requests -= 1
@@ -0,0 +1,290 @@
+"""
+Question answering over large text documents with chunked map-reduce
+
+An uploaded file is streamed in blocks and decoded incrementally, so memory use does not depend
+on its size. The text is cut into chunks that fit the model's prompt limit; every chunk is asked
+about the question as soon as it has been read (map, with bounded parallelism, which also slows
+the download down when DIAL is the bottleneck), and the partial answers are combined into one
+reply (reduce), in several rounds when they do not fit into a single prompt.
+"""
+
+import asyncio
+import codecs
+import logging
+import time
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Tuple
+
+import aiohttp
+
+from dial_client import DialClient, DialError
+from scheduler import BULK, RequestScheduler, estimate_cost
+import config
+
+logger = logging.getLogger(__name__)
+
+DOWNLOAD_BLOCK_SIZE = 64 * 1024
+CHARS_PER_TOKEN = 4
+# Prompt tokens kept free for the instructions and the question
+PROMPT_RESERVE_TOKENS = 500
+MIN_CHUNK_TOKENS = 256
+NO_ANSWER = "NOTHING"
+
+MAP_PROMPT = (
+    "You are reading one part of a longer document. Using only this part, write down everything "
+    "that helps answer the user's question, as concisely as possible. If the part contains nothing "
+    f"relevant, reply with exactly {NO_ANSWER}."
+)
+REDUCE_PROMPT = (
+    "You are given notes taken from consecutive parts of one document. Combine them into a single "
+    "answer to the user's question. Remove repetitions and do not mention the parts or the notes."
+)
+
+
+def split_text(buffer: str, max_chars: int, final: bool = False) -> Tuple[List[str], str]:
+    """
+    Cut chunks of at most max_chars off a text buffer, preferring to cut at line breaks
+
+    Returns:
+        The complete chunks and the remaining text (empty when final)
+    """
+    chunks = []
+    start = 0
+    while len(buffer) - start > max_chars:
+        end = buffer.rfind('\n', start + max_chars // 2, start + max_chars)
+        end = start + max_chars if end == -1 else end + 1
+        chunks.append(buffer[start:end])
+        start = end
+    rest = buffer[start:]
+    if final:
+        if rest.strip():
+            chunks.append(rest)
+        rest = ''
+    return chunks, rest
+
+
+async def iter_chunks(blocks: AsyncIterator[bytes], max_chars: int) -> AsyncIterator[str]:
+    """Decode UTF-8 blocks incrementally and yield text chunks of at most max_chars"""
+    decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
+    buffer = ''
+    async for block in blocks:
+        chunks, buffer = split_text(buffer + decoder.decode(block), max_chars)
+        for chunk in chunks:
+            yield chunk
+    chunks, _ = split_text(buffer + decoder.decode(b'', final=True), max_chars, final=True)
+    for chunk in chunks:
+        yield chunk
+
+
+class DocumentJob:
+    """Progress and token usage of one document being processed"""
+
+    def __init__(self, name: str, total_bytes: Optional[int]):
+        self.name = name
+        self.total_bytes = total_bytes
+        self.bytes_read = 0
+        self.chunks_read = 0
+        self.chunks_done = 0
+        self.chunks_failed = 0
+        self.reduce_calls = 0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.started_at = time.monotonic()
+        self.finished_at: Optional[float] = None
+
+    def add_usage(self, usage: Dict[str, int]):
+        """Add the token usage of one DIAL call"""
+        self.prompt_tokens += usage.get('prompt_tokens', 0)
+        self.completion_tokens += usage.get('completion_tokens', 0)
+
+    @property
+    def tokens(self) -> int:
+        return self.prompt_tokens + self.completion_tokens
+
+    @property
+    def elapsed(self) -> float:
+        return (self.finished_at or time.monotonic()) - self.started_at
+
+    @property
+    def tokens_per_second(self) -> float:
+        return self.tokens / self.elapsed if self.elapsed > 0 else 0.0
+
+    def describe_progress(self) -> str:
+        """Get a short progress line for the status message"""
+        read = (f"{self.bytes_read * 100 // self.total_bytes}%" if self.total_bytes
+                else f"{self.bytes_read / 1024:.0f} KB")
+        return (f"📄 {self.name}: read {read}, analysed {self.chunks_done}/{self.chunks_read} parts, "
+                f"{self.tokens:,} tokens ({self.tokens_per_second:,.0f} tokens/s)")
+
+
+class DocumentProcessor:
+    """Answers questions about documents too large for a single prompt"""
+
+    def __init__(self, dial_client: DialClient, scheduler: RequestScheduler):
+        self.dial_client = dial_client
+        self.scheduler = scheduler
+        self.chunk_tokens = config.DOCUMENT_CHUNK_TOKENS
+        self.max_parallel = config.DOCUMENT_MAX_PARALLEL
+        self.part_max_tokens = config.DOCUMENT_PART_MAX_TOKENS
+        self.totals = {"documents": 0, "failures": 0, "chunks": 0, "bytes": 0, "tokens": 0, "seconds": 0.0}
+
+    async def get_chunk_chars(self, model: str) -> int:
+        """Get the chunk size in characters that fits the model's prompt limit"""
+        tokens = self.chunk_tokens
+        prompt_limit = await self.dial_client.get_prompt_limit(model)
+        if prompt_limit:
+            tokens = min(tokens, prompt_limit - PROMPT_RESERVE_TOKENS)
+        return max(tokens, MIN_CHUNK_TOKENS) * CHARS_PER_TOKEN
+
+    async def stream_file(self, url: str, job: DocumentJob) -> AsyncIterator[bytes]:
+        """Download a file in blocks, counting the bytes read"""
+        async with aiohttp.ClientSession() as session:
+            async with session.get(url) as response:
+                response.raise_for_status()
+                async for block in response.content.iter_chunked(DOWNLOAD_BLOCK_SIZE):
+                    job.bytes_read += len(block)
+                    yield block
+
+    async def answer(self, blocks: AsyncIterator[bytes], job: DocumentJob, question: str, user_id: str,
+                     model: str, max_tokens: int, reasoning_effort: Optional[str] = None,
+                     on_progress: Optional[Callable[[DocumentJob], Awaitable[None]]] = None) -> str:
+        """
+        Answer a question about a document
+
+        Args:
+            blocks: Raw UTF-8 blocks of the document, e.g. from stream_file()
+            job: Progress of this document, updated while it is processed
+            question: The user's question
+            user_id: ID of the requesting user, for scheduling and logging
+            model: Model used for all calls
+            max_tokens: Output budget of the final answer
+            reasoning_effort: Reasoning effort of the final answer
+            on_progress: Awaited after every analysed part
+
+        Returns:
+            The answer
+
+        Raises:
+            DialError: If no part could be analysed or combining the notes failed
+        """
+        max_chars = await self.get_chunk_chars(model)
+        semaphore = asyncio.Semaphore(self.max_parallel)
+        tasks: List[asyncio.Task] = []
+        loop = asyncio.get_running_loop()
+
+        async def map_chunk(index: int, chunk: str) -> Optional[str]:
+            try:
+                answer = await self._ask(
+                    f"Question: {question}\n\nDocument part {index + 1}:\n{chunk}", MAP_PROMPT,
+                    job, user_id, model, self.part_max_tokens
+                )
+                return None if answer.strip() == NO_ANSWER else answer
+            except DialError:
+                job.chunks_failed += 1
+                return None
+            finally:
+                semaphore.release()
+                job.chunks_done += 1
+                if on_progress is not None:
+                    await on_progress(job)
+
+        try:
+            async for chunk in iter_chunks(blocks, max_chars):
+                # Waiting here pauses the download while the maximum number of parts is in flight
+                await semaphore.acquire()
+                tasks.append(loop.create_task(map_chunk(job.chunks_read, chunk)))
+                job.chunks_read += 1
+            partial_answers = [answer for answer in await asyncio.gather(*tasks) if answer]
+        except BaseException:
+            for task in tasks:
+                task.cancel()
+            raise
+
+        if not job.chunks_read:
+            return "The document is empty, there is nothing to analyse."
+        if job.chunks_failed == job.chunks_read:
+            raise DialError("Sorry, I couldn't analyse the document right now.")
+        if not partial_answers:
+            return "I couldn't find anything about that in the document."
+        return await self._reduce(partial_answers, job, question, user_id, model, max_tokens,
+                                  reasoning_effort, max_chars)
+
+    async def _reduce(self, answers: List[str], job: DocumentJob, question: str, user_id: str, model: str,
+                      max_tokens: int, reasoning_effort: Optional[str], max_chars: int) -> str:
+        """Combine partial answers, in several rounds when they do not fit into one prompt"""
+        while True:
+            groups = self._group(answers, max_chars)
+            if len(groups) == 1:
+                if len(answers) == 1:
+                    return answers[0]
+                job.reduce_calls += 1
+                return await self._ask(self._format_notes(question, answers), REDUCE_PROMPT, job, user_id,
+                                       model, max_tokens, reasoning_effort)
+
+            semaphore = asyncio.Semaphore(self.max_parallel)
+
+            async def reduce_group(group: List[str]) -> str:
+                async with semaphore:
+                    job.reduce_calls += 1
+                    return await self._ask(self._format_notes(question, group), REDUCE_PROMPT, job, user_id,
+                                           model, self.part_max_tokens)
+
+            answers = await asyncio.gather(*(reduce_group(group) for group in groups))
+
+    @staticmethod
+    def _group(answers: List[str], max_chars: int) -> List[List[str]]:
+        """Split answers into consecutive groups that fit into one prompt (at least two per group)"""
+        groups = [[]]
+        size = 0
+        for answer in answers:
+            if len(groups[-1]) >= 2 and size + len(answer) > max_chars:
+                groups.append([])
+                size = 0
+            groups[-1].append(answer)
+            size += len(answer)
+        return groups
+
+    @staticmethod
+    def _format_notes(question: str, answers: List[str]) -> str:
+        """Build the user message of a reduce call"""
+        return f"Question: {question}\n\nNotes:\n\n" + "\n\n---\n\n".join(answers)
+
+    async def _ask(self, message: str, instructions: str, job: DocumentJob, user_id: str, model: str,
+                   max_tokens: int, reasoning_effort: Optional[str] = None) -> str:
+        """
+        Send one map or reduce call through the scheduler as bulk traffic
+
+        Raises:
+            DialError: If the call failed or returned no text
+        """
+        response = await self.scheduler.run(
+            user_id, BULK,
+            lambda: self.dial_client.send_message(
+                message, user_id, model=model, max_tokens=max_tokens,
+                history=[{"role": "system", "content": instructions}],
+                reasoning_effort=reasoning_effort, on_usage=job.add_usage
+            ),
+            cost=estimate_cost(len(instructions) + len(message))
+        )
+        if not response:
+            raise DialError("Sorry, I didn't receive a valid response.")
+        return response
+
+    def record(self, job: DocumentJob, succeeded: bool):
+        """Add a finished document to the totals and log its throughput"""
+        job.finished_at = time.monotonic()
+        self.totals["documents" if succeeded else "failures"] += 1
+        self.totals["chunks"] += job.chunks_read
+        self.totals["bytes"] += job.bytes_read
+        self.totals["tokens"] += job.tokens
+        self.totals["seconds"] += job.elapsed
+        logger.info(f"📄 Processed {job.name}: {job.bytes_read / 1024:.0f} KB in {job.chunks_read} parts "
+                    f"(+{job.reduce_calls} reduce calls), {job.tokens:,} tokens in {job.elapsed:.1f}s "
+                    f"({job.tokens_per_second:,.0f} tokens/s)")
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get document throughput for the runtime monitor"""
+        seconds = self.totals["seconds"]
+        return {
+            **self.totals,
+            "tokens_per_second": self.totals["tokens"] / seconds if seconds else 0.0,
+        }
@@ -0,0 +1,118 @@
+"""
+Hot reload of DIAL settings and model tables without restarting the bot
+
+A reload is triggered by the admin /reload command or by a watcher that polls the
+modification times of CONFIG_FILE and MODEL_CONFIG_FILE. The new configuration is validated
+first and then swapped in one step: requests already in flight finish with the settings they
+started with, and the warm connection pool is kept when the DIAL host is unchanged.
+"""
+
+import asyncio
+import logging
+import os
+from typing import Any, Callable, Dict, List, Optional
+
+from dial_client import DialClient, DialSettings
+from model_config import ModelConfig
+import config
+
+logger = logging.getLogger(__name__)
+
+
+class ConfigReloader:
+    """Reloads configuration on demand or when the configuration files change"""
+
+    def __init__(self, dial_client: DialClient, interval: float = None):
+        self.dial_client = dial_client
+        self.interval = config.CONFIG_WATCH_INTERVAL if interval is None else interval
+        self.listeners: List[Callable[[List[str]], None]] = []
+        self.stats = {"reloads": 0, "failures": 0, "pool_kept": 0, "pool_replaced": 0}
+        self.last_error: Optional[str] = None
+        self._lock = asyncio.Lock()
+        self._task: Optional[asyncio.Task] = None
+
+        # An invalid model config file should stop the bot at startup, not at the first reload
+        ModelConfig.load_tables(config.MODEL_CONFIG_FILE)
+        self.mtimes = self._get_mtimes()
+
+    def register_listener(self, listener: Callable[[List[str]], None]):
+        """Register a callable that is given the names of changed settings after each reload"""
+        self.listeners.append(listener)
+
+    def start(self):
+        """Start watching the configuration files on the running loop"""
+        if self.interval > 0 and (self._task is None or self._task.done()):
+            self._task = asyncio.get_running_loop().create_task(self._watch())
+
+    async def stop(self):
+        """Stop watching the configuration files"""
+        if self._task and not self._task.done():
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+
+    def _get_mtimes(self) -> Dict[str, Optional[int]]:
+        """Get modification times of the watched files (None for missing files)"""
+        mtimes = {}
+        for path in (config.CONFIG_FILE, config.MODEL_CONFIG_FILE):
+            if not path:
+                continue
+            try:
+                mtimes[path] = os.stat(path).st_mtime_ns
+            except OSError:
+                mtimes[path] = None
+        return mtimes
+
+    async def _watch(self):
+        """Reload whenever a watched file changes"""
+        while True:
+            await asyncio.sleep(self.interval)
+            mtimes = self._get_mtimes()
+            if mtimes == self.mtimes:
+                continue
+            self.mtimes = mtimes
+            logger.info("👀 Configuration file changed, reloading")
+            try:
+                await self.reload()
+            except (OSError, ValueError):
+                pass  # Logged and counted by reload(); the current settings stay active
+
+    async def reload(self) -> Dict[str, Any]:
+        """
+        Reload DIAL settings, latency tiers and model tables
+
+        Returns:
+            Names of the changed settings and whether the connection pool was kept
+
+        Raises:
+            OSError, ValueError: If the new configuration is invalid; nothing is changed then
+        """
+        async with self._lock:
+            try:
+                tables = ModelConfig.read_tables(config.MODEL_CONFIG_FILE)
+                changed = config.reload()
+            except (OSError, ValueError) as e:
+                self.stats["failures"] += 1
+                self.last_error = str(e)
+                logger.error(f"❌ Configuration reload failed, keeping current settings: {e}")
+                raise
+
+            # Nothing below awaits before the new settings are in place, so no request sees a mix
+            ModelConfig.set_tables(tables)
+            pool_kept = await self.dial_client.apply_settings(DialSettings.from_config())
+            for listener in self.listeners:
+                listener(changed)
+
+            self.stats["reloads"] += 1
+            self.stats["pool_kept" if pool_kept else "pool_replaced"] += 1
+            self.last_error = None
+            logger.info(f"🔄 Configuration reloaded (changed: {', '.join(changed) or 'nothing'}; "
+                        f"{'kept' if pool_kept else 'replaced'} connection pool; "
+                        f"{self.dial_client.in_flight_requests} requests in flight on previous settings)")
+            return {"changed": changed, "pool_kept": pool_kept}
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get reload counters for the runtime monitor"""
+        return {**self.stats, "model": self.dial_client.model, "last_error": self.last_error or "none"}
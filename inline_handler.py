@@ -0,0 +1,224 @@
+"""
+Inline query handling with per-user debouncing, cancellation of superseded requests
+and caching of recent answers
+"""
+
+import asyncio
+import hashlib
+import logging
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+from telegram import InlineQuery, InlineQueryResultArticle, InputTextMessageContent, Update
+from telegram.error import TelegramError
+from telegram.ext import ContextTypes
+
+from dial_client import DialClient, DialError
+from scheduler import SHORT, RequestScheduler
+import config
+
+logger = logging.getLogger(__name__)
+
+# Telegram limits
+MAX_MESSAGE_LENGTH = 4096
+MAX_DESCRIPTION_LENGTH = 100
+
+
+class AnswerCache:
+    """LRU cache of answers with a time-to-live"""
+
+    def __init__(self, max_size: int, ttl: float):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.entries: OrderedDict = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: str) -> Optional[str]:
+        """Get a cached answer, or None if missing or expired"""
+        entry = self.entries.get(key)
+        if entry is None or entry[0] < time.monotonic():
+            if entry is not None:
+                del self.entries[key]
+            self.misses += 1
+            return None
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return entry[1]
+
+    def put(self, key: str, answer: str):
+        """Store an answer, evicting the least recently used entry when full"""
+        self.entries[key] = (time.monotonic() + self.ttl, answer)
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_size:
+            self.entries.popitem(last=False)
+
+    def get_stats(self) -> Dict[str, int]:
+        """Get hit/miss counters for the runtime monitor"""
+        return {"hits": self.hits, "misses": self.misses, "size": len(self.entries)}
+
+
+class InlineQueryManager:
+    """Answers inline queries while keeping DIAL traffic proportional to finished questions, not keystrokes"""
+
+    def __init__(self, dial_client: DialClient, scheduler: RequestScheduler):
+        self.dial_client = dial_client
+        self.scheduler = scheduler
+        self.model = config.DIAL_INLINE_MODEL
+        self.debounce_seconds = config.INLINE_DEBOUNCE_SECONDS
+        self.session_idle_seconds = config.INLINE_SESSION_IDLE_SECONDS
+        self.cache = AnswerCache(config.INLINE_CACHE_SIZE, config.INLINE_CACHE_TTL)
+        self.pending: Dict[int, asyncio.Task] = {}
+        # Ordered by last activity, oldest first
+        self.sessions: "OrderedDict[int, Dict[str, Any]]" = OrderedDict()
+        self.totals = {"sessions": 0, "queries": 0, "upstream_calls": 0, "cancelled_calls": 0}
+        self._expiry_task: Optional[asyncio.Task] = None
+
+    def start(self):
+        """Start reporting idle sessions on the running loop"""
+        if self._expiry_task is None or self._expiry_task.done():
+            self._expiry_task = asyncio.get_running_loop().create_task(self._expire_idle_sessions())
+
+    async def stop(self):
+        """Stop the session expiry task and report the open sessions"""
+        if self._expiry_task and not self._expiry_task.done():
+            self._expiry_task.cancel()
+            try:
+                await self._expiry_task
+            except asyncio.CancelledError:
+                pass
+        while self.sessions:
+            self._report_session(*self.sessions.popitem(last=False))
+
+    async def _expire_idle_sessions(self):
+        """Report sessions of users who stopped typing, even if they never send another query"""
+        while True:
+            await asyncio.sleep(self.session_idle_seconds)
+            self._expire_sessions(time.monotonic())
+
+    @staticmethod
+    def normalize_query(text: str) -> str:
+        """Normalize a query so trivially different keystroke states share a cache entry"""
+        return " ".join(text.split()).lower()
+
+    def _expire_sessions(self, now: float):
+        """Report and forget the sessions idle for longer than the session idle gap"""
+        while self.sessions:
+            user_id, session = next(iter(self.sessions.items()))
+            if now - session["last_seen"] <= self.session_idle_seconds:
+                break
+            del self.sessions[user_id]
+            self._report_session(user_id, session)
+
+    def _touch_session(self, user_id: int, session: Dict[str, Any]):
+        """Mark a session as active now"""
+        session["last_seen"] = time.monotonic()
+        if self.sessions.get(user_id) is session:
+            self.sessions.move_to_end(user_id)
+
+    def _get_session(self, user_id: int) -> Dict[str, Any]:
+        """Get the user's current inline session, starting a new one after a pause in typing"""
+        now = time.monotonic()
+        self._expire_sessions(now)
+        session = self.sessions.get(user_id)
+        if session is None:
+            session = {"queries": 0, "upstream_calls": 0, "cache_hits": 0, "cancelled_calls": 0, "last_seen": now}
+            self.sessions[user_id] = session
+            self.totals["sessions"] += 1
+        self._touch_session(user_id, session)
+        return session
+
+    def _report_session(self, user_id: int, session: Dict[str, Any]):
+        """Log upstream usage of a finished inline session"""
+        logger.info(f"📊 Inline session for user {user_id}: {session['queries']} queries, "
+                    f"{session['upstream_calls']} upstream calls, {session['cache_hits']} cache hits, "
+                    f"{session['cancelled_calls']} cancelled calls")
+
+    async def handle_inline_query(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        """Handle an inline query update"""
+        inline_query = update.inline_query
+        query_text = self.normalize_query(inline_query.query)
+        if not query_text:
+            return
+
+        user_id = inline_query.from_user.id
+        session = self._get_session(user_id)
+        session["queries"] += 1
+        self.totals["queries"] += 1
+
+        # Whatever the user typed before is now stale
+        previous = self.pending.pop(user_id, None)
+        if previous is not None and not previous.done():
+            previous.cancel()
+
+        cached_answer = self.cache.get(query_text)
+        if cached_answer is not None:
+            session["cache_hits"] += 1
+            await self._answer(inline_query, query_text, cached_answer)
+            return
+
+        # Answer in a background task so the update processor is free for the next keystroke
+        self.pending[user_id] = context.application.create_task(
+            self._debounced_answer(inline_query, query_text, session)
+        )
+
+    async def _debounced_answer(self, inline_query: InlineQuery, query_text: str, session: Dict[str, Any]):
+        """Wait for the user to stop typing, then ask DIAL and answer the query"""
+        user_id = inline_query.from_user.id
+        calling_upstream = False
+        try:
+            await asyncio.sleep(self.debounce_seconds)
+
+            calling_upstream = True
+            session["upstream_calls"] += 1
+            self.totals["upstream_calls"] += 1
+            try:
+                answer = await self.scheduler.run(
+                    str(user_id), SHORT,
+                    lambda: self.dial_client.send_message(query_text, str(user_id), model=self.model,
+                                                          max_tokens=config.INLINE_MAX_TOKENS)
+                )
+                if answer:
+                    self.cache.put(query_text, answer)
+            except DialError as e:
+                answer = str(e)
+            calling_upstream = False
+
+            await self._answer(inline_query, query_text, answer or "Sorry, I couldn't process your request right now.")
+        except asyncio.CancelledError:
+            if calling_upstream:
+                session["cancelled_calls"] += 1
+                self.totals["cancelled_calls"] += 1
+                logger.debug(f"🚫 Cancelled superseded inline request for user {user_id}")
+            raise
+        finally:
+            if self.pending.get(user_id) is asyncio.current_task():
+                del self.pending[user_id]
+            # A slow answer keeps the session open until it has been counted
+            self._touch_session(user_id, session)
+
+    async def _answer(self, inline_query: InlineQuery, query_text: str, answer: str):
+        """Send a single article result for the query"""
+        result_id = hashlib.md5(query_text.encode('utf-8')).hexdigest()
+        result = InlineQueryResultArticle(
+            id=result_id,
+            title=inline_query.query[:MAX_DESCRIPTION_LENGTH],
+            description=answer[:MAX_DESCRIPTION_LENGTH],
+            input_message_content=InputTextMessageContent(answer[:MAX_MESSAGE_LENGTH])
+        )
+        try:
+            await inline_query.answer([result], cache_time=int(config.INLINE_CACHE_TTL), is_personal=False)
+        except TelegramError as e:
+            # Queries expire quickly; a late answer is expected occasionally
+            logger.warning(f"⚠️ Could not answer inline query for user {inline_query.from_user.id}: {e}")
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get aggregate counters for the runtime monitor"""
+        sessions = self.totals["sessions"]
+        return {
+            **self.totals,
+            "upstream_calls_per_session": self.totals["upstream_calls"] / sessions if sessions else 0.0,
+            "pending": len(self.pending),
+            "open_sessions": len(self.sessions)
+        }
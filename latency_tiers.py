@@ -0,0 +1,121 @@
+"""
+User-selectable latency tiers and per-tier latency and cost tracking
+"""
+
+import asyncio
+import logging
+import time
+from collections import deque
+from typing import Any, Dict, Optional
+
+from dial_client import DialClient
+import config
+
+logger = logging.getLogger(__name__)
+
+TIER_DESCRIPTIONS = {
+    'fast': "⚡ Fast - quick, short answers",
+    'balanced': "⚖️ Balanced - the default trade-off between speed and depth",
+    'deep': "🧠 Deep - more reasoning and longer answers, slower",
+}
+
+# Do not hammer the catalogue when pricing is unavailable
+PRICING_RETRY_SECONDS = 600
+
+
+def get_tier(name: Optional[str]) -> Dict[str, Any]:
+    """Get a tier's settings, falling back to the default tier for unknown names"""
+    return config.LATENCY_TIERS.get(name) or config.LATENCY_TIERS[config.DEFAULT_LATENCY_TIER]
+
+
+def percentile(values, fraction: float) -> float:
+    """Get a percentile of a sequence of numbers (nearest rank)"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+class TierTracker:
+    """Collects latency, token usage and cost per latency tier"""
+
+    def __init__(self, dial_client: DialClient, window: int = 200):
+        self.dial_client = dial_client
+        self.latencies = {tier: deque(maxlen=window) for tier in config.LATENCY_TIERS}
+        self.totals = {
+            tier: {"requests": 0, "requests_with_usage": 0, "prompt_tokens": 0, "completion_tokens": 0}
+            for tier in config.LATENCY_TIERS
+        }
+        # Token usage per tier and model; priced when the stats are read, so requests recorded
+        # before the catalogue pricing arrived are included
+        self.usage_by_model: Dict[str, Dict[str, Dict[str, int]]] = {tier: {} for tier in config.LATENCY_TIERS}
+        self.pricing_checked_at = None
+        self._pricing_task: Optional[asyncio.Task] = None
+
+    def _ensure_pricing(self):
+        """Load catalogue pricing in the background once (retrying occasionally if it was unavailable)"""
+        if self.dial_client.model_pricing or (self._pricing_task and not self._pricing_task.done()):
+            return
+        now = time.monotonic()
+        if self.pricing_checked_at is None or now - self.pricing_checked_at > PRICING_RETRY_SECONDS:
+            self.pricing_checked_at = now
+            self._pricing_task = asyncio.get_running_loop().create_task(self._load_pricing())
+
+    async def _load_pricing(self):
+        """Download the catalogue pricing"""
+        try:
+            await self.dial_client.get_model_pricing()
+        except Exception as e:
+            logger.warning(f"⚠️ Could not load model pricing: {e}")
+
+    async def stop(self):
+        """Cancel a pricing download still in progress"""
+        if self._pricing_task and not self._pricing_task.done():
+            self._pricing_task.cancel()
+            try:
+                await self._pricing_task
+            except asyncio.CancelledError:
+                pass
+
+    def record(self, tier: str, model: str, latency: float, usage: Dict[str, int]):
+        """
+        Record one answered request; never waits for the catalogue
+
+        The latency is always recorded. Tokens and cost only when the response reported usage,
+        and the averages are taken over those requests only.
+        """
+        self.latencies[tier].append(latency)
+        totals = self.totals[tier]
+        totals["requests"] += 1
+        if not usage:
+            logger.info(f"⏱️ {tier} tier answered in {latency:.2f}s with {model}, no usage reported")
+            return
+
+        self._ensure_pricing()
+        cost = self.dial_client.estimate_cost(model, usage)
+        totals["requests_with_usage"] += 1
+        totals["prompt_tokens"] += usage.get('prompt_tokens', 0)
+        totals["completion_tokens"] += usage.get('completion_tokens', 0)
+        model_usage = self.usage_by_model[tier].setdefault(model, {"prompt_tokens": 0, "completion_tokens": 0})
+        model_usage["prompt_tokens"] += usage.get('prompt_tokens', 0)
+        model_usage["completion_tokens"] += usage.get('completion_tokens', 0)
+        logger.info(f"⏱️ {tier} tier answered in {latency:.2f}s with {model}"
+                    + (f", cost ${cost:.6f}" if cost is not None else ""))
+
+    def get_cost(self, tier: str) -> float:
+        """Get the total cost of a tier's requests at the current catalogue pricing"""
+        return sum(self.dial_client.estimate_cost(model, usage) or 0.0
+                   for model, usage in self.usage_by_model[tier].items())
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get per-tier latency percentiles and average cost for the runtime monitor"""
+        stats = {}
+        for tier, latencies in self.latencies.items():
+            totals = self.totals[tier]
+            stats[f"{tier}_requests"] = totals["requests"]
+            stats[f"{tier}_p50_ms"] = percentile(latencies, 0.5) * 1000
+            stats[f"{tier}_p95_ms"] = percentile(latencies, 0.95) * 1000
+            requests = totals["requests_with_usage"]
+            stats[f"{tier}_avg_completion_tokens"] = totals["completion_tokens"] / requests if requests else 0.0
+            stats[f"{tier}_avg_cost_usd"] = self.get_cost(tier) / requests if requests else 0.0
+        return stats
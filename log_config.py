@@ -0,0 +1,199 @@
+"""
+Logging setup with a background queue pipeline, lazy payload serialization,
+payload sampling and redaction of secrets and message contents
+"""
+
+import atexit
+import json
+import logging
+import logging.handlers
+import queue
+import random
+from typing import Any, Optional
+
+import config
+
+LOG_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+
+# Payload keys whose values must never reach the logs
+SECRET_KEYS = {'api-key', 'api_key', 'authorization', 'x-api-key'}
+
+_listener: Optional[logging.handlers.QueueListener] = None
+
+
+def redact_text(text: str) -> str:
+    """Replace user message contents with their length when redaction is enabled"""
+    if not config.LOG_REDACT or text is None:
+        return text
+    return f"<{len(text)} chars>"
+
+
+def redact_payload(data: Any) -> Any:
+    """Return a copy of a request/response payload with secrets and message contents masked"""
+    if isinstance(data, dict):
+        redacted = {}
+        for key, value in data.items():
+            if str(key).lower() in SECRET_KEYS:
+                redacted[key] = "***"
+            elif key == 'content' and isinstance(value, str):
+                redacted[key] = redact_text(value)
+            else:
+                redacted[key] = redact_payload(value)
+        return redacted
+    if isinstance(data, list):
+        return [redact_payload(item) for item in data]
+    return data
+
+
+def should_log_payload() -> bool:
+    """Decide whether a verbose payload log should be emitted, based on the sample rate"""
+    rate = config.LOG_PAYLOAD_SAMPLE_RATE
+    return rate >= 1.0 or (rate > 0.0 and random.random() < rate)
+
+
+class LazyJson:
+    """Log argument that serializes (and redacts) a payload only when the record is formatted"""
+
+    __slots__ = ('data',)
+
+    def __init__(self, data: Any):
+        self.data = data
+
+    def __str__(self) -> str:
+        return json.dumps(redact_payload(self.data), indent=2, ensure_ascii=False, default=str)
+
+
+class RedactingFormatter(logging.Formatter):
+    """
+    Formatter that masks configured secrets in the formatted output
+
+    Masking happens in format() rather than in a filter, so a record with bad arguments is
+    reported by the handler's error handling instead of killing the listener thread.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.secrets = [secret for secret in (config.DIAL_API_KEY, config.TELEGRAM_BOT_TOKEN) if secret]
+
+    def mask(self, text: str) -> str:
+        """Replace every configured secret in the text"""
+        # Keep masking keys rotated by a config reload; in-flight requests may still log them
+        if config.DIAL_API_KEY and config.DIAL_API_KEY not in self.secrets:
+            self.secrets.append(config.DIAL_API_KEY)
+        for secret in self.secrets:
+            if secret in text:
+                text = text.replace(secret, "***")
+        return text
+
+    def format(self, record: logging.LogRecord) -> str:
+        return self.mask(super().format(record))
+
+
+class StructuredFormatter(RedactingFormatter):
+    """Format records as single-line JSON objects"""
+
+    # Attributes every LogRecord has; anything else was passed through ``extra``
+    RESERVED_ATTRS = set(vars(logging.LogRecord('', 0, '', 0, '', None, None))) | {'message', 'asctime'}
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "time": self.formatTime(record),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in self.RESERVED_ATTRS:
+                entry[key] = value
+        if record.exc_text:
+            entry["exception"] = record.exc_text
+        return self.mask(json.dumps(entry, ensure_ascii=False, default=str))
+
+
+class BackgroundQueueHandler(logging.handlers.QueueHandler):
+    """
+    Queue handler that leaves message formatting to the listener thread
+
+    The standard QueueHandler formats the message before enqueueing it, which would run
+    payload serialization on the event loop. Only the traceback is rendered eagerly, since
+    frames cannot be safely inspected once the caller has moved on. When the bounded queue
+    is full the record is dropped, and the number of drops is logged once there is room again.
+    """
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            if self.dropped:
+                self.queue.put_nowait(logging.makeLogRecord({
+                    "name": __name__, "levelno": logging.WARNING, "levelname": "WARNING",
+                    "msg": f"⚠️ Dropped {self.dropped} log records, the log queue was full"
+                }))
+                self.dropped = 0
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+class BackgroundQueueListener(logging.handlers.QueueListener):
+    """Queue listener whose stop sentinel waits for room in the bounded queue"""
+
+    def enqueue_sentinel(self) -> None:
+        self.queue.put(self._sentinel)
+
+
+def setup_logging(level: int = logging.INFO, structured: Optional[bool] = None,
+                  stream=None, queue_size: Optional[int] = None) -> logging.handlers.QueueListener:
+    """
+    Configure root logging to write through a background queue
+
+    Args:
+        level: Root logging level
+        structured: Emit JSON lines instead of plain text (defaults to LOG_FORMAT=json)
+        stream: Stream to write to (defaults to stderr)
+        queue_size: Records buffered for the listener before new ones are dropped
+            (defaults to LOG_QUEUE_SIZE)
+
+    Returns:
+        The running queue listener
+    """
+    global _listener
+
+    if structured is None:
+        structured = config.LOG_FORMAT == 'json'
+    if queue_size is None:
+        queue_size = config.LOG_QUEUE_SIZE
+
+    stop_logging()
+
+    stream_handler = logging.StreamHandler(stream)
+    stream_handler.setFormatter(StructuredFormatter() if structured else RedactingFormatter(LOG_FORMAT))
+
+    log_queue = queue.Queue(maxsize=queue_size)
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(BackgroundQueueHandler(log_queue))
+    root.setLevel(level)
+
+    _listener = BackgroundQueueListener(log_queue, stream_handler, respect_handler_level=True)
+    _listener.start()
+    return _listener
+
+
+@atexit.register
+def stop_logging():
+    """Flush pending records and stop the background listener"""
+    global _listener
+
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
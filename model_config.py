@@ -2,7 +2,8 @@
 Model configuration and parameter handling for different AI DIAL models
 """
 
-from typing import Dict, Any
+import json
+from typing import Dict, Any, List, Optional, Set
 
 class ModelConfig:
     """Configuration handler for different AI DIAL models"""
@@ -36,6 +37,17 @@ class ModelConfig:
         'o1-2024-12-17'
     }
 
+    # Models that accept the reasoning_effort parameter (low/medium/high)
+    REASONING_EFFORT_MODELS = {
+        'gpt-5-2025-08-07',
+        'gpt-5-mini-2025-08-07',
+        'gpt-5-nano-2025-08-07',
+        'o3-mini-2025-01-31',
+        'o3-2025-04-16',
+        'o4-mini-2025-04-16',
+        'o1-2024-12-17'
+    }
+
     # Models that use max_output_tokens (Gemini models)
     MAX_OUTPUT_TOKENS_MODELS = {
         'gemini-1.5-pro-google-search',
@@ -51,8 +63,61 @@ class ModelConfig:
         'gemini-2.5-flash-lite'
     }
 
+    # Models that reject messages with the system role
+    NO_SYSTEM_MESSAGE_MODELS = {
+        'o1-mini-2024-09-12'
+    }
+
+    # Tables that can be replaced from a JSON file (file key -> attribute)
+    TABLES = {
+        'no_temperature_models': 'NO_TEMPERATURE_MODELS',
+        'max_completion_tokens_models': 'MAX_COMPLETION_TOKENS_MODELS',
+        'reasoning_effort_models': 'REASONING_EFFORT_MODELS',
+        'max_output_tokens_models': 'MAX_OUTPUT_TOKENS_MODELS',
+        'no_system_message_models': 'NO_SYSTEM_MESSAGE_MODELS'
+    }
+
+    @classmethod
+    def read_tables(cls, path: Optional[str]) -> Dict[str, Set[str]]:
+        """
+        Read model tables from a JSON file without applying them
+
+        The file maps table names (keys of TABLES) to lists of model names; tables missing
+        from the file (or all of them, without a file) are the built-in ones.
+
+        Raises:
+            OSError, ValueError: If the file cannot be read or is invalid
+        """
+        tables = dict(_BUILT_IN_TABLES)
+        if not path:
+            return tables
+
+        with open(path, encoding='utf-8') as f:
+            data = json.load(f)
+        if not isinstance(data, dict):
+            raise ValueError("Model config file must contain a JSON object")
+        for key, models in data.items():
+            if key not in cls.TABLES:
+                raise ValueError(f"Unknown model table '{key}', expected one of: {', '.join(cls.TABLES)}")
+            if not isinstance(models, list) or not all(isinstance(model, str) for model in models):
+                raise ValueError(f"Model table '{key}' must be a list of model names")
+            tables[cls.TABLES[key]] = set(models)
+        return tables
+
     @classmethod
-    def get_model_parameters(cls, model: str, max_tokens: int = 1000, temperature: float = 0.7) -> Dict[str, Any]:
+    def set_tables(cls, tables: Dict[str, Set[str]]):
+        """Replace the model tables with ones returned by read_tables()"""
+        for attribute, models in tables.items():
+            setattr(cls, attribute, models)
+
+    @classmethod
+    def load_tables(cls, path: Optional[str]):
+        """Read and apply model tables from a JSON file"""
+        cls.set_tables(cls.read_tables(path))
+
+    @classmethod
+    def get_model_parameters(cls, model: str, max_tokens: int = 1000, temperature: float = 0.7,
+                             reasoning_effort: Optional[str] = None) -> Dict[str, Any]:
         """
         Get appropriate parameters for the specific model
 
@@ -60,6 +125,7 @@ class ModelConfig:
             model: Model identifier
             max_tokens: Maximum tokens to generate
             temperature: Temperature for randomness (0.0 to 1.0)
+            reasoning_effort: Reasoning effort (low/medium/high), sent only to models that support it
 
         Returns:
             Dictionary of parameters suitable for the model
@@ -78,6 +144,10 @@ class ModelConfig:
         if model not in cls.NO_TEMPERATURE_MODELS:
             params["temperature"] = temperature
 
+        # Handle reasoning effort parameter
+        if reasoning_effort and model in cls.REASONING_EFFORT_MODELS:
+            params["reasoning_effort"] = reasoning_effort
+
         return params
 
     @classmethod
@@ -85,6 +155,32 @@ class ModelConfig:
         """Check if model supports temperature parameter"""
         return model not in cls.NO_TEMPERATURE_MODELS
 
+    @classmethod
+    def supports_reasoning_effort(cls, model: str) -> bool:
+        """Check if model supports reasoning_effort parameter"""
+        return model in cls.REASONING_EFFORT_MODELS
+
+    @classmethod
+    def supports_system_messages(cls, model: str) -> bool:
+        """Check if model accepts messages with the system role"""
+        return model not in cls.NO_SYSTEM_MESSAGE_MODELS
+
+    @classmethod
+    def adapt_messages(cls, model: str, messages: List[Dict[str, str]]) -> List[Dict[str, str]]:
+        """
+        Adapt chat messages to the model
+
+        For models without system message support, system messages (instructions, history
+        summaries) are removed and their content is put in front of the last user message.
+        """
+        if model not in cls.NO_SYSTEM_MESSAGE_MODELS or not any(m["role"] == "system" for m in messages):
+            return messages
+        instructions = [m["content"] for m in messages if m["role"] == "system"]
+        adapted = [m for m in messages if m["role"] != "system"]
+        last = adapted[-1]
+        adapted[-1] = {**last, "content": "\n\n".join([*instructions, last["content"]])}
+        return adapted
+
     @classmethod
     def get_token_param_name(cls, model: str) -> str:
         """Get the correct token parameter name for the model"""
@@ -102,4 +198,7 @@ class ModelConfig:
         reasoning_models = ['deepseek.r1-v1:0', 'deepseek-r1', 'gpt-oss-120b']
 
         return (any(model.startswith(prefix) for prefix in reasoning_prefixes) or
-                model in reasoning_models)
\ No newline at end of file
+                model in reasoning_models)
+
+
+_BUILT_IN_TABLES = {attribute: getattr(ModelConfig, attribute) for attribute in ModelConfig.TABLES.values()}
@@ -1,24 +1,105 @@
 #!/usr/bin/env python3
 """
 Enhanced bot runner with connection testing and error handling
+
+Starts fast by default: python-telegram-bot is imported in a thread while a lightweight DIAL
+readiness probe runs, the probe overlaps Telegram initialization, and its warm connection is
+reused by the bot. A successful probe is cached for READINESS_CACHE_TTL seconds, so restarts do
+not wait for DIAL at all. Use --full-check for the previous sequential start that downloads the
+whole model catalogue first.
 """
 
+import time
+
+STARTED_AT = time.perf_counter()
+
+import argparse
 import asyncio
+import hashlib
+import importlib
+import json
 import logging
+import os
+import signal
 import sys
-from telegram import Update
-from bot import TelegramDialBot
-from dial_client import DialClient
+from log_config import setup_logging
+import config
 
 # Setup logging
-logging.basicConfig(
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    level=logging.INFO
-)
+setup_logging(logging.INFO)
 logger = logging.getLogger(__name__)
 
+
+class StartupTimer:
+    """Collects the duration of each startup phase"""
+
+    def __init__(self):
+        self.phases = []
+        self.last = STARTED_AT
+
+    def mark(self, phase: str):
+        """Record the time since the previous mark (phases running concurrently overlap)"""
+        now = time.perf_counter()
+        self.phases.append((phase, now - self.last))
+        self.last = now
+
+    def since_start(self) -> float:
+        return time.perf_counter() - STARTED_AT
+
+    def report(self):
+        """Log the startup breakdown"""
+        breakdown = ", ".join(f"{phase} {seconds * 1000:.0f} ms" for phase, seconds in self.phases)
+        logger.info(f"⏱️ Ready to handle updates {self.since_start() * 1000:.0f} ms after start ({breakdown})")
+
+
+def get_settings_fingerprint() -> str:
+    """Identify the DIAL endpoint, key and model without storing the key"""
+    settings = f"{config.DIAL_API_URL}|{config.DIAL_MODEL}|{config.DIAL_API_KEY}"
+    return hashlib.sha256(settings.encode()).hexdigest()[:16]
+
+
+def load_cached_readiness() -> bool:
+    """Check for a recent successful readiness probe of the same settings"""
+    if config.READINESS_CACHE_TTL <= 0:
+        return False
+    try:
+        with open(config.READINESS_CACHE_FILE, encoding='utf-8') as f:
+            cached = json.load(f)
+    except (OSError, ValueError):
+        return False
+    return (cached.get('fingerprint') == get_settings_fingerprint()
+            and time.time() - cached.get('checked_at', 0) < config.READINESS_CACHE_TTL)
+
+
+def save_readiness(ready: bool):
+    """Cache the result of a readiness probe"""
+    try:
+        if ready:
+            with open(config.READINESS_CACHE_FILE, 'w', encoding='utf-8') as f:
+                json.dump({'fingerprint': get_settings_fingerprint(), 'checked_at': time.time()}, f)
+        elif os.path.exists(config.READINESS_CACHE_FILE):
+            os.remove(config.READINESS_CACHE_FILE)
+    except OSError as e:
+        logger.warning(f"⚠️ Could not update readiness cache {config.READINESS_CACHE_FILE}: {e}")
+
+
+async def probe_dial(client) -> bool:
+    """Run the lightweight readiness probe and cache its result"""
+    started = time.perf_counter()
+    ready, detail = await client.probe()
+    save_readiness(ready)
+    elapsed = (time.perf_counter() - started) * 1000
+    if ready:
+        logger.info(f"✅ DIAL API ready in {elapsed:.0f} ms ({detail})")
+    else:
+        logger.error(f"❌ DIAL API not ready after {elapsed:.0f} ms: {detail}")
+    return ready
+
+
 async def test_dial_connection():
     """Test DIAL connection before starting the bot"""
+    from dial_client import DialClient
+
     logger.info("Testing DIAL API connection...")
 
     client = DialClient()
@@ -44,44 +125,137 @@ async def test_dial_connection():
     finally:
         await client.close()
 
-async def main():
+
+def track_first_update(bot, timer: StartupTimer):
+    """Log how long after start the first update was handled"""
+    from telegram import Update
+    from telegram.ext import TypeHandler
+
+    handled = False
+
+    # Handler groups run in order, so group 1 sees the update after the bot's handlers in group 0.
+    # The handler stays registered: handlers cannot be removed while an update is being processed.
+    async def first_update_handled(update: Update, context):
+        nonlocal handled
+        if not handled:
+            handled = True
+            logger.info(f"⏱️ First update handled {timer.since_start() * 1000:.0f} ms after start")
+
+    bot.application.add_handler(TypeHandler(Update, first_update_handled), group=1)
+
+
+def warn_if_not_ready(probe: asyncio.Task):
+    """Warn when a probe that was not waited for fails"""
+    if not probe.cancelled() and not probe.result():
+        logger.warning("⚠️ DIAL readiness probe failed although a recent check succeeded")
+
+
+async def start_bot(full_check: bool, timer: StartupTimer):
+    """Initialize the bot and the DIAL readiness check, overlapping them where possible"""
+    if full_check:
+        # Previous behaviour: full catalogue download, then a fresh session for the bot
+        if not await test_dial_connection():
+            return None
+        timer.mark("DIAL catalogue check")
+        bot_module = importlib.import_module('bot')
+        timer.mark("imports")
+        bot = bot_module.TelegramDialBot()
+        timer.mark("bot setup")
+        await bot.application.initialize()
+        timer.mark("Telegram initialize")
+        return bot
+
+    from dial_client import DialClient
+    client = DialClient()
+    cached_ready = load_cached_readiness()
+    probe = asyncio.get_running_loop().create_task(probe_dial(client))
+    timer.mark("DIAL client import")
+
+    # Importing python-telegram-bot takes a few hundred ms; do it while the probe waits on the network
+    bot_module = await asyncio.to_thread(importlib.import_module, 'bot')
+    timer.mark("bot imports")
+    bot = bot_module.TelegramDialBot(dial_client=client)
+    timer.mark("bot setup")
+    await bot.application.initialize()
+    timer.mark("Telegram initialize")
+
+    if cached_ready:
+        logger.info("⚡ DIAL was ready recently; not waiting for the readiness probe")
+        probe.add_done_callback(warn_if_not_ready)
+        return bot
+
+    if not await probe:
+        await bot.application.shutdown()
+        await client.close()
+        return None
+    timer.mark("DIAL probe wait")
+    return bot
+
+
+async def main(full_check: bool = False):
     """Main async function to run the bot"""
     logger.info("🚀 Starting Telegram DIAL Bot...")
+    timer = StartupTimer()
 
-    # Test DIAL connection first
-    if not await test_dial_connection():
+    bot = await start_bot(full_check, timer)
+    if bot is None:
         logger.error("❌ Cannot start bot due to DIAL connection issues")
         sys.exit(1)
 
-    # Start the bot
-    bot = None
+    # Imported by now, in a thread during start_bot
+    from telegram import Update
+
+    application = bot.application
+    stop_event = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for signal_number in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(signal_number, stop_event.set)
+        except NotImplementedError:
+            pass  # Windows: KeyboardInterrupt ends asyncio.run instead
+
     try:
-        bot = TelegramDialBot()
+        # Same order as Application.run_polling, which cannot be awaited inside a running loop
+        await bot.post_init(application)
+        timer.mark("background services")
+        track_first_update(bot, timer)
+        await application.updater.start_polling(allowed_updates=Update.ALL_TYPES)
+        await application.start()
+        timer.mark("polling start")
+        timer.report()
         logger.info("✅ Bot initialized successfully!")
-        logger.info("🔄 Starting polling...")
-
-        # Run the bot using the application's async method
-        await bot.application.run_polling(allowed_updates=Update.ALL_TYPES)
 
-    except KeyboardInterrupt:
-        logger.info("🛑 Bot stopped by user")
+        await stop_event.wait()
+        logger.info("🛑 Bot stopped by signal")
     except Exception as e:
         logger.error(f"❌ Bot crashed: {e}")
         sys.exit(1)
     finally:
+        if application.updater.running:
+            await application.updater.stop()
+        if application.running:
+            await application.stop()
+        await application.shutdown()
+        await bot.post_shutdown(application)
         # Clean up the DIAL client session
-        if bot:
-            await bot.dial_client.close()
+        await bot.dial_client.close()
+
 
 def run_bot():
     """Synchronous wrapper to run the async main function"""
+    parser = argparse.ArgumentParser(description='Telegram DIAL Bot runner')
+    parser.add_argument('--full-check', action='store_true',
+                        help='Download the whole model catalogue before starting (slower startup)')
+    args = parser.parse_args()
+
     try:
-        asyncio.run(main())
+        asyncio.run(main(full_check=args.full_check))
     except KeyboardInterrupt:
         logger.info("🛑 Bot stopped by user")
     except Exception as e:
         logger.error(f"❌ Bot runner crashed: {e}")
         sys.exit(1)
 
+
 if __name__ == "__main__":
-    run_bot()
\ No newline at end of file
+    run_bot()
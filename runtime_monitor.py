@@ -0,0 +1,165 @@
+"""
+Runtime health monitoring and on-demand sampling profiler for the bot process
+"""
+
+import asyncio
+import io
+import logging
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from typing import Any, Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+def get_memory_rss() -> int:
+    """Get the resident set size of the current process in bytes"""
+    try:
+        with open('/proc/self/statm', 'r') as f:
+            resident_pages = int(f.read().split()[1])
+        return resident_pages * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError):
+        # Fall back to peak RSS where /proc is not available (macOS reports bytes, Linux KiB)
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == 'darwin' else peak * 1024
+
+
+class RuntimeMonitor:
+    """Tracks event loop lag and collects live runtime statistics"""
+
+    def __init__(self, interval: float = 0.5):
+        self.interval = interval
+        self.current_lag = 0.0
+        self.max_lag = 0.0
+        self.started_at = time.monotonic()
+        self.cache_stats: Dict[str, Callable[[], Dict[str, int]]] = {}
+        self.component_stats: Dict[str, Callable[[], Dict[str, Any]]] = {}
+        self._task: Optional[asyncio.Task] = None
+        self._loop_thread_id: Optional[int] = None
+
+    def start(self):
+        """Start the event loop lag sampler on the running loop"""
+        if self._task is None or self._task.done():
+            self._loop_thread_id = threading.get_ident()
+            self._task = asyncio.get_running_loop().create_task(self._measure_lag())
+
+    async def stop(self):
+        """Stop the event loop lag sampler"""
+        if self._task and not self._task.done():
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+
+    async def _measure_lag(self):
+        """Sleep for a fixed interval and record how late the loop wakes us up"""
+        loop = asyncio.get_running_loop()
+        while True:
+            expected = loop.time() + self.interval
+            await asyncio.sleep(self.interval)
+            lag = max(0.0, loop.time() - expected)
+            self.current_lag = lag
+            self.max_lag = max(self.max_lag, lag)
+            if lag > 1.0:
+                logger.warning(f"🐢 Event loop lag is {lag * 1000:.0f} ms")
+
+    def register_cache(self, name: str, stats_getter: Callable[[], Dict[str, int]]):
+        """
+        Register a cache so its hit ratio shows up in runtime stats
+
+        Args:
+            name: Display name of the cache
+            stats_getter: Callable returning a dict with 'hits' and 'misses'
+        """
+        self.cache_stats[name] = stats_getter
+
+    def register_component(self, name: str, stats_getter: Callable[[], Dict[str, Any]]):
+        """
+        Register a component whose counters show up in runtime stats
+
+        Args:
+            name: Display name of the component
+            stats_getter: Callable returning a flat dict of counters
+        """
+        self.component_stats[name] = stats_getter
+
+    def get_stats(self, dial_client=None) -> Dict[str, Any]:
+        """Collect a snapshot of runtime statistics"""
+        stats = {
+            "uptime": time.monotonic() - self.started_at,
+            "loop_lag_ms": self.current_lag * 1000,
+            "max_loop_lag_ms": self.max_lag * 1000,
+            "pending_tasks": len([task for task in asyncio.all_tasks() if not task.done()]),
+            "memory_rss": get_memory_rss(),
+            "caches": {},
+            "components": {name: stats_getter() for name, stats_getter in self.component_stats.items()},
+        }
+
+        if dial_client is not None:
+            stats["in_flight_requests"] = dial_client.in_flight_requests
+            stats["connection_pool"] = dial_client.get_pool_stats()
+
+        for name, stats_getter in self.cache_stats.items():
+            cache = stats_getter()
+            lookups = cache.get('hits', 0) + cache.get('misses', 0)
+            cache['hit_ratio'] = cache.get('hits', 0) / lookups if lookups else 0.0
+            stats["caches"][name] = cache
+
+        return stats
+
+    async def profile(self, duration: float, interval: float = 0.005) -> bytes:
+        """
+        Sample the event loop thread for a fixed duration
+
+        Args:
+            duration: How long to sample, in seconds
+            interval: Delay between samples, in seconds
+
+        Returns:
+            Collapsed stacks (one "frame;frame;frame count" line per stack) suitable
+            for flamegraph.pl, speedscope and similar tools
+        """
+        thread_id = self._loop_thread_id or threading.get_ident()
+        profiler = SamplingProfiler(thread_id, interval)
+        return await asyncio.to_thread(profiler.run, duration)
+
+
+class SamplingProfiler:
+    """Statistical profiler that periodically captures the stack of one thread"""
+
+    def __init__(self, thread_id: int, interval: float = 0.005):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.samples: Counter = Counter()
+
+    def run(self, duration: float) -> bytes:
+        """Sample the target thread until the duration elapses"""
+        deadline = time.monotonic() + duration
+        while time.monotonic() < deadline:
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is not None:
+                self.samples[self._collapse(frame)] += 1
+            time.sleep(self.interval)
+        return self.to_collapsed()
+
+    @staticmethod
+    def _collapse(frame) -> str:
+        """Turn a frame into a root-first, semicolon separated stack"""
+        stack = []
+        while frame is not None:
+            code = frame.f_code
+            stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})")
+            frame = frame.f_back
+        return ";".join(reversed(stack))
+
+    def to_collapsed(self) -> bytes:
+        """Render the collected samples in collapsed stack format"""
+        output = io.StringIO()
+        for stack, count in self.samples.most_common():
+            output.write(f"{stack} {count}\n")
+        return output.getvalue().encode('utf-8')
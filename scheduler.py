@@ -0,0 +1,172 @@
+"""
+Priority-aware scheduler for DIAL calls with weighted fair queuing across users and aging
+"""
+
+import asyncio
+import itertools
+import logging
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+import config
+
+logger = logging.getLogger(__name__)
+
+# Priority classes, highest first
+ADMIN = 'admin'
+SHORT = 'short'
+INTERACTIVE = 'interactive'
+BULK = 'bulk'
+PRIORITY_CLASSES = (ADMIN, SHORT, INTERACTIVE, BULK)
+
+
+def classify_request(is_admin: bool, is_group: bool, prompt_length: int) -> str:
+    """Get the priority class of a request"""
+    if is_admin:
+        return ADMIN
+    if is_group:
+        return BULK
+    if prompt_length <= config.SHORT_PROMPT_CHARS:
+        return SHORT
+    return INTERACTIVE
+
+
+def estimate_cost(prompt_length: int) -> float:
+    """Relative cost of a request: a fixed part plus one unit per ~1000 prompt tokens"""
+    return 1.0 + prompt_length / 4000
+
+
+def parse_weights(spec: str) -> Dict[str, float]:
+    """Parse "admin=8,short=4,..." into class weights, keeping defaults for missing classes"""
+    weights = {ADMIN: 8.0, SHORT: 4.0, INTERACTIVE: 2.0, BULK: 1.0}
+    for item in filter(None, (part.strip() for part in spec.split(','))):
+        name, _, value = item.partition('=')
+        if name.strip() not in weights:
+            raise ValueError(f"Unknown priority class in SCHEDULER_WEIGHTS: {name}")
+        weights[name.strip()] = float(value)
+    return weights
+
+
+class _Entry:
+    """A queued request waiting for an execution slot"""
+
+    __slots__ = ('user_id', 'priority_class', 'finish_tag', 'enqueued_at', 'sequence', 'future')
+
+    def __init__(self, user_id: str, priority_class: str, finish_tag: float, sequence: int,
+                 future: asyncio.Future):
+        self.user_id = user_id
+        self.priority_class = priority_class
+        self.finish_tag = finish_tag
+        self.enqueued_at = time.monotonic()
+        self.sequence = sequence
+        self.future = future
+
+
+class RequestScheduler:
+    """
+    Limits concurrent DIAL calls and decides who goes next
+
+    Self-clocked fair queuing: each request gets a virtual finish tag of
+    max(virtual time, user's last finish tag) + cost / class weight, so a user with many
+    queued requests is interleaved with everyone else and higher classes move ahead.
+    Waiting time is subtracted from the tag (aging), so bulk work is never starved.
+    """
+
+    def __init__(self, max_concurrency: int = None, weights: Dict[str, float] = None,
+                 aging_rate: float = None):
+        self.available = max_concurrency or config.DIAL_MAX_CONCURRENCY
+        self.weights = weights or parse_weights(config.SCHEDULER_WEIGHTS)
+        self.aging_rate = config.SCHEDULER_AGING_RATE if aging_rate is None else aging_rate
+        self.virtual_time = 0.0
+        self.user_finish: Dict[str, float] = {}
+        self.pending: List[_Entry] = []
+        self._sequence = itertools.count()
+        self.wait_stats = {name: {"count": 0, "total_wait": 0.0, "max_wait": 0.0} for name in PRIORITY_CLASSES}
+
+    async def run(self, user_id: str, priority_class: str, request: Callable[[], Awaitable[Any]],
+                  cost: float = 1.0) -> Any:
+        """
+        Wait for a slot according to priority and fairness, then run the request
+
+        Args:
+            user_id: Fairness key; each user gets their share of the slots
+            priority_class: One of PRIORITY_CLASSES
+            request: Callable creating the awaitable to run once scheduled
+            cost: Relative size of the request (e.g. prompt length based)
+        """
+        entry = self._enqueue(user_id, priority_class, cost)
+        try:
+            await entry.future
+        except asyncio.CancelledError:
+            if entry.future.done() and not entry.future.cancelled():
+                # A slot was granted just before cancellation; hand it to the next request
+                self._release()
+            elif entry in self.pending:
+                self.pending.remove(entry)
+            raise
+
+        self._record_wait(entry)
+        try:
+            return await request()
+        finally:
+            self._release()
+
+    def _enqueue(self, user_id: str, priority_class: str, cost: float) -> _Entry:
+        """Tag a request and try to dispatch it right away"""
+        start_tag = max(self.virtual_time, self.user_finish.get(user_id, 0.0))
+        finish_tag = start_tag + cost / self.weights[priority_class]
+        self.user_finish[user_id] = finish_tag
+
+        entry = _Entry(user_id, priority_class, finish_tag, next(self._sequence),
+                       asyncio.get_running_loop().create_future())
+        self.pending.append(entry)
+        self._dispatch()
+        return entry
+
+    def _pick_next(self) -> Optional[_Entry]:
+        """Get the pending entry with the lowest aged finish tag"""
+        now = time.monotonic()
+        return min(
+            self.pending,
+            key=lambda entry: (entry.finish_tag - (now - entry.enqueued_at) * self.aging_rate, entry.sequence),
+            default=None
+        )
+
+    def _dispatch(self):
+        """Grant free slots to the best pending requests"""
+        while self.available > 0 and self.pending:
+            entry = self._pick_next()
+            self.pending.remove(entry)
+            if entry.future.cancelled():
+                continue
+            self.available -= 1
+            self.virtual_time = max(self.virtual_time, entry.finish_tag)
+            entry.future.set_result(None)
+
+        # Forget users that have fallen behind the virtual clock
+        if not self.pending and len(self.user_finish) > 10000:
+            self.user_finish = {user: tag for user, tag in self.user_finish.items() if tag > self.virtual_time}
+
+    def _release(self):
+        """Return a slot and dispatch the next request"""
+        self.available += 1
+        self._dispatch()
+
+    def _record_wait(self, entry: _Entry):
+        """Record queue wait time of a dispatched request"""
+        wait = time.monotonic() - entry.enqueued_at
+        stats = self.wait_stats[entry.priority_class]
+        stats["count"] += 1
+        stats["total_wait"] += wait
+        stats["max_wait"] = max(stats["max_wait"], wait)
+        if wait > 5.0:
+            logger.warning(f"⏳ {entry.priority_class} request of user {entry.user_id} waited {wait:.1f}s for a DIAL slot")
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get per-class queue wait times for the runtime monitor"""
+        stats: Dict[str, Any] = {"queued": len(self.pending), "free_slots": self.available}
+        for name, class_stats in self.wait_stats.items():
+            count = class_stats["count"]
+            stats[f"{name}_avg_wait_ms"] = class_stats["total_wait"] / count * 1000 if count else 0.0
+            stats[f"{name}_max_wait_ms"] = class_stats["max_wait"] * 1000
+        return stats
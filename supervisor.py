@@ -0,0 +1,214 @@
+"""
+Multi-process sharded deployment: one process ingests Telegram updates and routes
+them to worker processes by consistent hash of the chat ID
+"""
+
+import asyncio
+import bisect
+import hashlib
+import logging
+import multiprocessing
+import queue
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from telegram import Update
+from telegram.ext import Application, ContextTypes, TypeHandler
+
+from log_config import setup_logging
+import config
+
+logger = logging.getLogger(__name__)
+
+# Sentinel telling a worker to finish its queue and exit
+STOP_WORKER = None
+
+
+class HashRing:
+    """Consistent hash ring mapping shard keys to worker indexes"""
+
+    def __init__(self, nodes: List[int], replicas: int = 100):
+        self.ring: List[Tuple[int, int]] = sorted(
+            (self._hash(f"{node}:{replica}"), node) for node in nodes for replica in range(replicas)
+        )
+        self.hashes = [point for point, _ in self.ring]
+
+    @staticmethod
+    def _hash(key: str) -> int:
+        """Stable hash that is identical in every process (unlike the builtin hash)"""
+        return int.from_bytes(hashlib.md5(key.encode('utf-8')).digest()[:8], 'big')
+
+    def get_node(self, key: Any) -> int:
+        """Get the worker index responsible for a key"""
+        index = bisect.bisect(self.hashes, self._hash(str(key))) % len(self.ring)
+        return self.ring[index][1]
+
+
+def get_shard_key(update: Update) -> int:
+    """Get the routing key of an update: the chat, or the user for chat-less updates like inline queries"""
+    if update.effective_chat is not None:
+        return update.effective_chat.id
+    if update.effective_user is not None:
+        return update.effective_user.id
+    return update.update_id
+
+
+def run_bot_worker(worker_id: int, update_queue: multiprocessing.Queue, debug_mode: bool = False):
+    """Worker process entry point: process routed updates with a regular TelegramDialBot"""
+    from bot import TelegramDialBot
+
+    setup_logging(logging.DEBUG if debug_mode else logging.INFO)
+    logger.info(f"👷 Worker {worker_id} starting")
+
+    bot = TelegramDialBot(debug_mode=debug_mode)
+    asyncio.run(bot.run_worker(update_queue))
+
+
+class ShardedSupervisor:
+    """Runs N worker processes and keeps every chat pinned to one of them"""
+
+    def __init__(self, num_workers: int, worker_target: Optional[Callable] = None,
+                 worker_args: Tuple = (), debug_mode: bool = False):
+        self.num_workers = num_workers
+        self.worker_target = worker_target or run_bot_worker
+        self.worker_args = worker_args or (debug_mode,)
+        self.debug_mode = debug_mode
+        self.context = multiprocessing.get_context('spawn')
+        self.queues = [self.context.Queue() for _ in range(num_workers)]
+        self.processes: List[Optional[multiprocessing.Process]] = [None] * num_workers
+        self.started_at = [0.0] * num_workers
+        self.restarts = [0] * num_workers
+        self.routed = [0] * num_workers
+        self.ring = HashRing(list(range(num_workers)))
+        self.stopping = False
+
+    def start_worker(self, worker_id: int):
+        """Start (or restart) one worker process"""
+        process = self.context.Process(
+            target=self.worker_target,
+            args=(worker_id, self.queues[worker_id], *self.worker_args),
+            name=f"dial-bot-worker-{worker_id}",
+            daemon=True
+        )
+        process.start()
+        self.processes[worker_id] = process
+        self.started_at[worker_id] = time.monotonic()
+
+    def start_workers(self):
+        """Start all worker processes"""
+        for worker_id in range(self.num_workers):
+            self.start_worker(worker_id)
+        logger.info(f"🚀 Started {self.num_workers} workers")
+
+    def dispatch(self, shard_key: Any, update_data: Dict[str, Any]) -> int:
+        """Send serialized update data to the worker owning the shard key"""
+        worker_id = self.ring.get_node(shard_key)
+        self.queues[worker_id].put(update_data)
+        self.routed[worker_id] += 1
+        return worker_id
+
+    def check_workers(self):
+        """Restart workers that have exited unexpectedly"""
+        if self.stopping:
+            return
+        for worker_id, process in enumerate(self.processes):
+            if process is None or process.is_alive():
+                continue
+
+            uptime = time.monotonic() - self.started_at[worker_id]
+            # Back off a worker that keeps crashing right after start
+            if uptime < config.WORKER_RESTART_BACKOFF_SECONDS * min(self.restarts[worker_id], 5):
+                continue
+
+            self.restarts[worker_id] += 1
+            logger.error(f"💥 Worker {worker_id} exited with code {process.exitcode}, "
+                         f"restarting (restart #{self.restarts[worker_id]})")
+            process.close()
+            self.replace_queue(worker_id)
+            self.start_worker(worker_id)
+
+    def replace_queue(self, worker_id: int):
+        """
+        Give a restarted worker a fresh queue, moving over the backlog that can still be read
+
+        A worker killed while waiting in get() never releases the queue's read lock, so its
+        replacement would block on the old queue forever.
+        """
+        old_queue = self.queues[worker_id]
+        new_queue = self.context.Queue()
+        moved = 0
+        while True:
+            try:
+                # Fails immediately (as if empty) when the dead worker holds the read lock
+                new_queue.put(old_queue.get_nowait())
+                moved += 1
+            except queue.Empty:
+                break
+        if not old_queue.empty():
+            logger.warning(f"⚠️ Dropped the pending updates of worker {worker_id}: its queue is locked by the dead process")
+        elif moved:
+            logger.info(f"📦 Moved {moved} pending updates to the new queue of worker {worker_id}")
+        old_queue.close()
+        old_queue.cancel_join_thread()
+        self.queues[worker_id] = new_queue
+
+    def stop_workers(self, timeout: float = 10.0):
+        """Ask workers to drain their queues and exit, terminating stragglers"""
+        self.stopping = True
+        for update_queue in self.queues:
+            update_queue.put(STOP_WORKER)
+
+        deadline = time.monotonic() + timeout
+        for worker_id, process in enumerate(self.processes):
+            if process is None:
+                continue
+            process.join(max(0.0, deadline - time.monotonic()))
+            if process.is_alive():
+                logger.warning(f"⚠️ Worker {worker_id} did not stop in time, terminating")
+                process.terminate()
+                process.join()
+        logger.info(f"🛑 All workers stopped (routed per worker: {self.routed})")
+
+    async def _watch_workers(self, interval: float = 1.0):
+        """Periodically restart crashed workers"""
+        while not self.stopping:
+            self.check_workers()
+            await asyncio.sleep(interval)
+
+    async def _forward_update(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        """Route every incoming update to its worker"""
+        worker_id = self.dispatch(get_shard_key(update), update.to_dict())
+        if self.debug_mode:
+            logger.debug(f"📬 Routed update {update.update_id} to worker {worker_id}")
+
+    async def _post_init(self, application: Application):
+        self.start_workers()
+        application.create_task(self._watch_workers())
+
+    async def _post_shutdown(self, application: Application):
+        self.stop_workers()
+
+    def run(self):
+        """Ingest updates once (webhook or polling) and route them to the workers"""
+        builder = (
+            Application.builder()
+            .token(config.TELEGRAM_BOT_TOKEN)
+            .post_init(self._post_init)
+            .post_shutdown(self._post_shutdown)
+        )
+        if config.TELEGRAM_BASE_URL:
+            builder = builder.base_url(config.TELEGRAM_BASE_URL)
+        application = builder.build()
+        application.add_handler(TypeHandler(Update, self._forward_update))
+
+        logger.info(f"🧭 Starting sharded supervisor with {self.num_workers} workers")
+        if config.WEBHOOK_URL:
+            application.run_webhook(
+                listen=config.WEBHOOK_LISTEN,
+                port=config.WEBHOOK_PORT,
+                url_path=config.TELEGRAM_BOT_TOKEN,
+                webhook_url=f"{config.WEBHOOK_URL.rstrip('/')}/{config.TELEGRAM_BOT_TOKEN}",
+                allowed_updates=Update.ALL_TYPES
+            )
+        else:
+            application.run_polling(allowed_updates=Update.ALL_TYPES)
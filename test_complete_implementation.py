@@ -6,7 +6,7 @@ Comprehensive test of the complete DIAL implementation
 import asyncio
 import logging
 import sys
-from dial_client import DialClient
+from dial_client import DialClient, DialError
 from model_config import ModelConfig
 import config
 
@@ -71,11 +71,11 @@ async def run_comprehensive_test():
         original_model = client.model
         client.model = "invalid-model-name"
 
-        error_response = await client.send_message("Test error handling", "test_user_error")
-        if "error" not in error_response.lower() and "sorry" not in error_response.lower():
+        try:
+            await client.send_message("Test error handling", "test_user_error")
             logger.warning("⚠️ Error handling might need improvement")
-        else:
-            logger.info("✅ Error handling works correctly")
+        except DialError as e:
+            logger.info(f"✅ Error handling works correctly: {e}")
 
         # Restore original model
         client.model = original_model
@@ -5,7 +5,7 @@ Test script to verify different model configurations
 
 import asyncio
 import logging
-from dial_client import DialClient
+from dial_client import DialClient, DialError
 from model_config import ModelConfig
 import config
 
@@ -53,8 +53,11 @@ async def test_actual_request():
         logger.info(f"Model info: {model_info}")
 
         # Test a simple request
-        response = await client.send_message("What is the capital of France?", "test_user")
-        logger.info(f"Response: {response}")
+        try:
+            response = await client.send_message("What is the capital of France?", "test_user")
+            logger.info(f"Response: {response}")
+        except DialError as e:
+            logger.error(f"❌ Request failed: {e}")
 
     finally:
         await client.close()
@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+Test worker restarts of the sharded supervisor (no Telegram or DIAL access needed)
+"""
+
+import logging
+import multiprocessing
+import os
+import signal
+import time
+
+os.environ.setdefault('TELEGRAM_BOT_TOKEN', '123456:test-token')
+os.environ.setdefault('DIAL_API_KEY', 'test-key')
+
+from supervisor import ShardedSupervisor
+
+# Setup logging
+logging.basicConfig(
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+    level=logging.INFO
+)
+logger = logging.getLogger(__name__)
+
+
+def echo_worker(worker_id: int, update_queue: multiprocessing.Queue, result_queue: multiprocessing.Queue):
+    """Worker that reports every routed update together with its process ID"""
+    while True:
+        update_data = update_queue.get()
+        if update_data is None:
+            break
+        result_queue.put((os.getpid(), update_data))
+
+
+def test_restart_after_hard_kill():
+    """A worker killed while waiting for updates is replaced by one that receives new updates"""
+    result_queue = multiprocessing.get_context('spawn').Queue()
+    supervisor = ShardedSupervisor(1, worker_target=echo_worker, worker_args=(result_queue,))
+    supervisor.start_workers()
+    try:
+        supervisor.dispatch(1, {"update_id": 1})
+        first_pid, update = result_queue.get(timeout=30)
+        assert update == {"update_id": 1}
+
+        # The idle worker is blocked in update_queue.get(), holding the queue's read lock
+        time.sleep(0.5)
+        os.kill(first_pid, signal.SIGKILL)
+        supervisor.processes[0].join(10)
+        supervisor.check_workers()
+        assert supervisor.restarts[0] == 1
+
+        supervisor.dispatch(1, {"update_id": 2})
+        second_pid, update = result_queue.get(timeout=30)
+        assert update == {"update_id": 2}
+        assert second_pid != first_pid
+    finally:
+        supervisor.stop_workers()
+
+
+def test_restart_moves_backlog():
+    """Updates queued for a worker that exited cleanly are delivered to its replacement"""
+    result_queue = multiprocessing.get_context('spawn').Queue()
+    supervisor = ShardedSupervisor(1, worker_target=echo_worker, worker_args=(result_queue,))
+    supervisor.start_workers()
+    try:
+        supervisor.queues[0].put(None)  # Stops the worker without holding the lock
+        supervisor.processes[0].join(30)
+        supervisor.dispatch(1, {"update_id": 1})
+        supervisor.dispatch(1, {"update_id": 2})
+        time.sleep(0.5)  # Let the queue's feeder thread write the updates
+        supervisor.check_workers()
+
+        received = [result_queue.get(timeout=30)[1]["update_id"] for _ in range(2)]
+        assert received == [1, 2]
+    finally:
+        supervisor.stop_workers()
+
+
+if __name__ == "__main__":
+    test_restart_after_hard_kill()
+    test_restart_moves_backlog()
+    logger.info("✅ Supervisor restart tests passed")
@@ -0,0 +1,166 @@
+"""
+Deduplication of redelivered Telegram updates
+
+Polling can redeliver updates after a crash or redeploy. Recently seen update IDs are kept
+in an in-memory ring; completed answers and the highest answered update ID (high-water mark)
+are persisted next to the chat state, so a redelivered update gets its stored answer resent
+instead of another paid DIAL call.
+"""
+
+import logging
+import sqlite3
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+from chat_state import ChatStateStore
+import config
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS update_answers (
+    update_id INTEGER PRIMARY KEY,
+    chat_id INTEGER NOT NULL,
+    answer TEXT NOT NULL,
+    created_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS bot_meta (
+    key TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+"""
+
+HIGH_WATER_MARK_KEY = 'update_high_water_mark'
+
+
+class UpdateDeduplicator:
+    """Detects already handled updates and remembers their answers"""
+
+    def __init__(self, store: ChatStateStore, ring_size: int = None):
+        self.store = store
+        self.ring_size = ring_size or config.DEDUP_RING_SIZE
+        # update_id -> answer (None while in progress or when there is nothing to resend)
+        self.recent: OrderedDict = OrderedDict()
+        self.pending_answers: Dict[int, Tuple[int, str]] = {}
+        self.high_water_mark = 0
+        self.persisted_high_water_mark = 0
+        self.last_prune = 0.0
+        self.stats = {"deduplicated": 0, "resent": 0, "skipped": 0}
+
+    @property
+    def persistent(self) -> bool:
+        return self.store.connection is not None
+
+    async def start(self):
+        """Create tables and load the persisted high-water mark"""
+        await self.store.start()
+        if not self.persistent:
+            return
+        self.high_water_mark = await self.store.run_in_db_thread(self._load_high_water_mark)
+        self.persisted_high_water_mark = self.high_water_mark
+        self.store.register_flusher(self.flush)
+        logger.info(f"🔁 Update high-water mark is {self.high_water_mark}")
+
+    def _load_high_water_mark(self) -> int:
+        """Create tables and read the high-water mark (database thread)"""
+        connection = self.store.connection
+        connection.executescript(SCHEMA)
+        row = connection.execute("SELECT value FROM bot_meta WHERE key = ?", (HIGH_WATER_MARK_KEY,)).fetchone()
+        return row[0] if row else 0
+
+    async def check(self, update_id: int) -> Tuple[bool, Optional[str]]:
+        """
+        Check an incoming update and claim it if it is new
+
+        Returns:
+            (is_duplicate, stored_answer) - stored_answer is set when a duplicate was already answered
+        """
+        if update_id in self.recent:
+            return self._duplicate(update_id, self.recent[update_id])
+
+        # Only updates at or below the high-water mark can have been answered before a restart
+        if update_id <= self.high_water_mark and self.persistent:
+            answer = await self.store.run_in_db_thread(self._select_answer, update_id)
+            if answer is not None:
+                self._remember(update_id, answer)
+                return self._duplicate(update_id, answer)
+
+        self._remember(update_id, None)
+        return False, None
+
+    def _duplicate(self, update_id: int, answer: Optional[str]) -> Tuple[bool, Optional[str]]:
+        """Count a deduplicated update"""
+        self.stats["deduplicated"] += 1
+        self.stats["resent" if answer else "skipped"] += 1
+        logger.info(f"🔁 Update {update_id} was already {'answered, resending stored answer' if answer else 'handled, skipping'}")
+        return True, answer
+
+    def _select_answer(self, update_id: int) -> Optional[str]:
+        """Read a stored answer (database thread)"""
+        row = self.store.connection.execute(
+            "SELECT answer FROM update_answers WHERE update_id = ?", (update_id,)
+        ).fetchone()
+        return row[0] if row else None
+
+    def _remember(self, update_id: int, answer: Optional[str]):
+        """Add an update to the in-memory ring"""
+        self.recent[update_id] = answer
+        self.recent.move_to_end(update_id)
+        while len(self.recent) > self.ring_size:
+            self.recent.popitem(last=False)
+
+    def complete(self, update_id: int, chat_id: int, answer: str):
+        """Record the answer of a handled update; it is persisted on the next flush"""
+        self._remember(update_id, answer)
+        self.pending_answers[update_id] = (chat_id, answer)
+        self.high_water_mark = max(self.high_water_mark, update_id)
+
+    def release(self, update_id: int):
+        """Forget a claimed update that failed, so a redelivery is handled again"""
+        if self.recent.get(update_id, '') is None:
+            del self.recent[update_id]
+
+    async def flush(self):
+        """Persist pending answers and the high-water mark"""
+        if not self.persistent:
+            return
+        prune = time.monotonic() - self.last_prune > config.DEDUP_ANSWER_RETENTION / 10
+        if not self.pending_answers and self.high_water_mark == self.persisted_high_water_mark and not prune:
+            return
+
+        batch = self.pending_answers
+        self.pending_answers = {}
+        high_water_mark = self.high_water_mark
+        try:
+            await self.store.run_in_db_thread(self._write_batch, batch, high_water_mark, prune)
+        except sqlite3.Error:
+            for update_id, value in batch.items():
+                self.pending_answers.setdefault(update_id, value)
+            raise
+        self.persisted_high_water_mark = high_water_mark
+        if prune:
+            self.last_prune = time.monotonic()
+
+    def _write_batch(self, batch: Dict[int, Tuple[int, str]], high_water_mark: int, prune: bool):
+        """Write answers and the high-water mark in one transaction (database thread)"""
+        now = time.time()
+        connection = self.store.connection
+        with connection:
+            connection.executemany(
+                "INSERT OR REPLACE INTO update_answers (update_id, chat_id, answer, created_at) VALUES (?, ?, ?, ?)",
+                [(update_id, chat_id, answer, now) for update_id, (chat_id, answer) in batch.items()]
+            )
+            # Several worker processes may share the database; never move the mark backwards
+            connection.execute(
+                "INSERT INTO bot_meta (key, value) VALUES (?, ?) "
+                "ON CONFLICT(key) DO UPDATE SET value = MAX(value, excluded.value)",
+                (HIGH_WATER_MARK_KEY, high_water_mark)
+            )
+            if prune:
+                connection.execute("DELETE FROM update_answers WHERE created_at < ?",
+                                   (now - config.DEDUP_ANSWER_RETENTION,))
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get deduplication counters for the runtime monitor"""
+        return {**self.stats, "high_water_mark": self.high_water_mark}